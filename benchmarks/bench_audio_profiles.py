@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+音频转码配置基准测试 - 对比各 AUDIO_PROFILE 的编码耗时、上传字节数与分段数
+
+用法: python benchmarks/bench_audio_profiles.py [audio_file] [--minutes 60]
+不指定文件时生成一段模拟 YouTube 原始音轨（AAC 128kbps 立体声 m4a）。
+需要本机安装 ffmpeg / ffprobe。
+"""
+
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加server目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from audio import AUDIO_PROFILES, get_audio_duration, segment_duration_for
+
+
+def make_synthetic_source(path: Path, seconds: int) -> None:
+    subprocess.run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=220:duration={seconds}',
+        '-f', 'lavfi', '-i', f'anoisesrc=amplitude=0.05:duration={seconds}',
+        '-filter_complex', 'amix=inputs=2', '-ac', '2',
+        '-c:a', 'aac', '-b:a', '128k', str(path), '-y'
+    ], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('audio_file', nargs='?', type=Path)
+    parser.add_argument('--minutes', type=int, default=60)
+    parser.add_argument('--max-segment', type=int, default=1800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.audio_file
+        if source is None:
+            source = Path(tmp) / "source.m4a"
+            make_synthetic_source(source, args.minutes * 60)
+        duration = get_audio_duration(source)
+
+        print(f"source: {source.name}, {duration / 60:.1f} min, {source.stat().st_size / 1e6:.1f} MB")
+        print(f"{'profile':>8} {'encode':>9} {'upload MB':>10} {'segment':>9} {'segments':>9}")
+        for profile in AUDIO_PROFILES.values():
+            out = Path(tmp) / f"out_{profile.name}.{profile.ext or source.suffix.lstrip('.')}"
+            start = time.perf_counter()
+            subprocess.run([
+                'ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', str(source),
+                '-vn', *profile.ffmpeg_args, str(out), '-y'
+            ], check=True)
+            elapsed = time.perf_counter() - start
+
+            segment = segment_duration_for(out, duration, args.max_segment)
+            segments = max(1, math.ceil(duration / segment))
+            print(f"{profile.name:>8} {elapsed:>8.2f}s {out.stat().st_size / 1e6:>10.1f} {segment:>8}s {segments:>9}")
+
+
+if __name__ == "__main__":
+    main()
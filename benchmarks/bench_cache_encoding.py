@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+缓存编码基准测试 - 对比旧版格式化 JSON 与紧凑/压缩编码的磁盘占用和加载延迟
+
+用法: python benchmarks/bench_cache_encoding.py [cache_dir] [--repeat 200]
+默认使用 server/cache 中的真实缓存条目。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加server目录到Python路径
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+sys.path.insert(0, SERVER_DIR)
+
+from cache_store import CODECS, JsonFileBackend, decode_entry, encode_entry, zstandard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cache_dir', nargs='?', type=Path, default=Path(SERVER_DIR) / 'cache')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    entries = [data for _, data in JsonFileBackend(args.cache_dir, float('inf')).items()]
+    if not entries:
+        print(f"No cache entries found in {args.cache_dir}")
+        return
+
+    encodings = {"legacy json": lambda d: json.dumps(d, ensure_ascii=False, indent=2).encode('utf-8')}
+    for codec in CODECS:
+        if codec == "zstd" and zstandard is None:
+            continue
+        encodings[codec] = lambda d, codec=codec: encode_entry(d, codec)
+
+    print(f"{len(entries)} entries from {args.cache_dir}")
+    print(f"{'encoding':>12} {'bytes':>10} {'ratio':>7} {'load/entry':>11}")
+    baseline = None
+    for name, encode in encodings.items():
+        blobs = [encode(d) for d in entries]
+        total = sum(len(b) for b in blobs)
+        baseline = baseline or total
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for blob in blobs:
+                decode_entry(blob)
+        per_entry = (time.perf_counter() - start) / (args.repeat * len(blobs))
+
+        print(f"{name:>12} {total:>10} {total / baseline:>6.0%} {per_entry * 1e6:>9.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
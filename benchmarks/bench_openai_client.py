@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+OpenAI 客户端基准测试 - 对比每次新建客户端、共享同步客户端与共享异步连接池的吞吐和尾延迟
+
+用法: python benchmarks/bench_openai_client.py [--requests 400] [--latency 50] [--concurrency 1 8 32]
+在本机启动一个兼容 OpenAI 的桩服务（固定延迟返回 chat completion），不会访问真实 API。
+调用方式与服务端一致：多个线程并发发起同步调用。
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加server目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from openai import OpenAI
+from openai_client import OpenAIClientConfig, SharedOpenAIClient
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "- 结论\n整体观点：基准测试"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+}
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    body = json.dumps(COMPLETION).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+MESSAGES = [{"role": "user", "content": "bench"}]
+
+
+def run(call, concurrency: int, requests: int):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=50, help='stub response latency in ms')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    stub = start_stub(args.latency / 1000)
+    base_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+
+    shared_sync = OpenAI(api_key="bench", base_url=base_url, max_retries=0)
+    shared_async = SharedOpenAIClient(OpenAIClientConfig(api_key="bench", base_url=base_url, max_retries=0))
+
+    def per_call_client():
+        client = OpenAI(api_key="bench", base_url=base_url, max_retries=0)
+        try:
+            client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+        finally:
+            client.close()
+
+    modes = {
+        "new client per call": per_call_client,
+        "shared sync client": lambda: shared_sync.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES),
+        "shared async pool": lambda: shared_async.call(
+            lambda c: c.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)),
+    }
+
+    print(f"{args.requests} requests per run, stub latency {args.latency:.0f}ms")
+    print(f"{'client':>20} {'conc':>5} {'req/s':>8} {'p50':>8} {'p99':>8}")
+    for name, call in modes.items():
+        call()  # warm up connections
+        for concurrency in args.concurrency:
+            rps, p50, p99 = run(call, concurrency, args.requests)
+            print(f"{name:>20} {concurrency:>5} {rps:>8.1f} {p50 * 1000:>6.1f}ms {p99 * 1000:>6.1f}ms")
+
+    shared_async.close()
+    shared_sync.close()
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+音频分段基准测试 - 对比逐段 ffmpeg 调用与单次遍历分段
+
+用法: python benchmarks/bench_segmenter.py [--hours 1 3] [--segment 600]
+需要本机安装 ffmpeg / ffprobe。
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加server目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from audio import get_audio_duration, split_audio_file
+
+
+def make_synthetic_audio(path: Path, seconds: int) -> None:
+    """Generate a speech-like mono MP3 (tone + noise) of the given length"""
+    subprocess.run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=220:duration={seconds}',
+        '-f', 'lavfi', '-i', f'anoisesrc=amplitude=0.05:duration={seconds}',
+        '-filter_complex', 'amix=inputs=2',
+        '-ac', '1', '-c:a', 'libmp3lame', '-b:a', '128k',
+        str(path), '-y'
+    ], check=True)
+
+
+def split_per_segment(file_path: Path, segment_duration: int) -> int:
+    """The previous strategy: one ffmpeg process per segment, each re-opening the input"""
+    duration = get_audio_duration(file_path)
+    segment_count = int(duration // segment_duration) + 1
+    for i in range(segment_count):
+        segment_file = file_path.with_name(f"{file_path.stem}_legacy_{i}{file_path.suffix}")
+        subprocess.run([
+            'ffmpeg', '-i', str(file_path),
+            '-ss', str(i * segment_duration), '-t', str(segment_duration),
+            '-c', 'copy', '-avoid_negative_ts', 'make_zero',
+            str(segment_file), '-y'
+        ], capture_output=True, check=True)
+    return segment_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 3])
+    parser.add_argument('--segment', type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"{'length':>8} {'segments':>9} {'per-segment':>12} {'single-pass':>12} {'speedup':>8}")
+    for hours in args.hours:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "synthetic.mp3"
+            make_synthetic_audio(source, int(hours * 3600))
+
+            start = time.perf_counter()
+            split_per_segment(source, args.segment)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            segments = split_audio_file(source, segment_duration=args.segment)
+            single = time.perf_counter() - start
+
+            print(f"{hours:>7g}h {len(segments):>9} {legacy:>11.2f}s {single:>11.2f}s {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+WebSocket 进度通道压测 - 大量订阅下的连接数与服务端 CPU 占用
+
+用法: python benchmarks/load_ws_progress.py [--connections 1] [--subs 500] [--update-hz 50]
+服务端在子进程中启动，并用合成的进度更新驱动 progress_store；
+先测空闲窗口（只保持连接与订阅），再测有更新的窗口。
+对比多路复用与每视频一个连接: --connections 500 --subs 1
+需要 server/requirements.txt 中的依赖（uvicorn[standard] 自带 websockets）。
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+
+# 添加server目录到Python路径
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+sys.path.insert(0, SERVER_DIR)
+
+
+def serve(port, jobs, update_hz, idle_seconds, active_seconds, start_event, results):
+    """Child process: the API server plus a thread emitting synthetic progress updates"""
+    sys.path.insert(0, SERVER_DIR)
+    import uvicorn
+    import app as server_app
+
+    store = server_app.progress_store
+    for i in range(jobs):
+        store.create(f"bench-job-{i}", {
+            "video_id": f"bench-video-{i}",
+            "status": "processing",
+            "current_step": "start",
+            "progress": 0,
+        })
+
+    def drive():
+        start_event.wait()
+        cpu_start = time.process_time()
+        time.sleep(idle_seconds)
+        idle_cpu = time.process_time() - cpu_start
+
+        interval = 1.0 / update_hz
+        sent = 0
+        cpu_start = time.process_time()
+        deadline = time.monotonic() + active_seconds
+        while time.monotonic() < deadline:
+            store.update(f"bench-job-{sent % jobs}", progress=(sent // jobs) % 100, current_step=f"step {sent}")
+            sent += 1
+            time.sleep(interval)
+        active_cpu = time.process_time() - cpu_start
+        results.put({"idle_cpu": idle_cpu, "active_cpu": active_cpu, "updates": sent})
+
+    threading.Thread(target=drive, daemon=True).start()
+    uvicorn.run(server_app.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for_port(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+async def run_client(url, ids, counts, ready):
+    import websockets
+
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"action": "subscribe", "ids": ids}))
+        async for raw in ws:
+            message = json.loads(raw)
+            counts[message["type"]] += 1
+            if message["type"] == "subscribed":
+                ready.release()
+
+
+async def run_clients(args, start_event, results):
+    url = f"ws://127.0.0.1:{args.port}/ws/progress"
+    counts: Counter = Counter()
+    ready = asyncio.Semaphore(0)
+    clients = []
+    for c in range(args.connections):
+        ids = [f"bench-job-{(c * args.subs + s) % args.jobs}" for s in range(args.subs)]
+        clients.append(asyncio.ensure_future(run_client(url, ids, counts, ready)))
+    for _ in clients:
+        await ready.acquire()
+
+    # Discard the initial full-record messages, only count deltas from the active window
+    await asyncio.sleep(1)
+    counts.clear()
+    start_event.set()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, results.get)
+
+    for client in clients:
+        client.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    return result, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1)
+    parser.add_argument('--subs', type=int, default=500, help='subscriptions per connection')
+    parser.add_argument('--jobs', type=int, default=500, help='synthetic jobs receiving updates')
+    parser.add_argument('--update-hz', type=float, default=50, help='progress updates per second across all jobs')
+    parser.add_argument('--idle', type=float, default=10, help='idle window in seconds')
+    parser.add_argument('--duration', type=float, default=20, help='active window in seconds')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    start_event = ctx.Event()
+    results = ctx.Queue()
+    server = ctx.Process(target=serve, args=(args.port, args.jobs, args.update_hz, args.idle,
+                                             args.duration, start_event, results), daemon=True)
+    server.start()
+    try:
+        wait_for_port(args.port)
+        result, counts = asyncio.run(run_clients(args, start_event, results))
+    finally:
+        server.terminate()
+        server.join()
+
+    subscriptions = args.connections * args.subs
+    print(f"connections:    {args.connections}")
+    print(f"subscriptions:  {subscriptions}")
+    print(f"server CPU idle:   {result['idle_cpu'] / args.idle:6.1%}")
+    print(f"server CPU active: {result['active_cpu'] / args.duration:6.1%} "
+          f"({result['updates']} updates, {result['updates'] / args.duration:.0f}/s)")
+    print(f"progress messages received: {counts['progress']} "
+          f"({counts['progress'] / args.duration:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
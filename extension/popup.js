@@ -100,20 +100,10 @@ $("summarizeBtn").addEventListener('click', async () => {
   const videoId = currentMeta.videoId;
   
   // Start progress monitoring
-  startProgressMonitoring(apiBase, videoId);
+  const stopProgressMonitoring = startProgressMonitoring(apiBase, videoId);
   
-  const requestUrl = `${apiBase}/api/summarize?video_id=${encodeURIComponent(videoId)}&lang=${encodeURIComponent(lang)}`;
-  console.log('[YT Extension Popup] Making request to:', requestUrl);
-
   try {
-    const res = await fetch(requestUrl);
-    console.log('[YT Extension Popup] Response status:', res.status);
-    
-    if (!res.ok) {
-      throw new Error(`HTTP ${res.status} - ${res.statusText}`);
-    }
-    
-    const data = await res.json();
+    const data = await runSummaryJob(apiBase, videoId, lang);
     console.log('[YT Extension Popup] Response data:', data);
 
     setConclusions(data?.conclusions || ['未获取到结论']);
@@ -145,9 +135,56 @@ $("summarizeBtn").addEventListener('click', async () => {
     } else {
       setStatus('❌ 处理失败：' + err.message);
     }
+  } finally {
+    stopProgressMonitoring();
   }
 });
 
+// Submit a summary job and poll it until the worker pool finishes it
+async function runSummaryJob(apiBase, videoId, lang) {
+  const jobsUrl = `${apiBase}/api/jobs`;
+  console.log('[YT Extension Popup] Submitting job to:', jobsUrl);
+
+  const res = await fetch(jobsUrl, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ video_id: videoId, lang })
+  });
+  console.log('[YT Extension Popup] Response status:', res.status);
+
+  if (!res.ok) {
+    throw new Error(`HTTP ${res.status} - ${res.statusText}`);
+  }
+
+  const { job_id: jobId } = await res.json();
+  // Jobs are persisted server-side, so keep polling through a server restart
+  const maxUnreachablePolls = 40;
+  let unreachablePolls = 0;
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, 1500));
+    let jobRes;
+    try {
+      jobRes = await fetch(`${apiBase}/api/jobs/${encodeURIComponent(jobId)}`);
+    } catch (err) {
+      if (++unreachablePolls >= maxUnreachablePolls) throw err;
+      setStatus('⏳ 服务器重启中，任务将自动恢复...');
+      continue;
+    }
+    unreachablePolls = 0;
+    if (!jobRes.ok) {
+      throw new Error(`HTTP ${jobRes.status} - ${jobRes.statusText}`);
+    }
+
+    const job = await jobRes.json();
+    if (job.status === 'completed') {
+      return job.result;
+    }
+    if (job.status === 'error') {
+      throw new Error(job.error || '任务失败');
+    }
+  }
+}
+
 function setStatus(t) { $("status").textContent = t; }
 function setConclusions(items) {
   const el = $("conclusions");
@@ -226,13 +263,95 @@ function showCookiesReminder() {
   return false; // Cancel request
 }
 
+// Render a progress record; returns true once the job has finished
+function renderProgress(progressData) {
+  if (progressData.status === 'processing') {
+    const progressBar = '█'.repeat(Math.floor(progressData.progress / 10)) + '░'.repeat(10 - Math.floor(progressData.progress / 10));
+    const progressText = `🔄 ${progressData.current_step}\n${progressBar} ${progressData.progress}%`;
+    setStatus(progressText);
+    return false;
+  }
+  if (progressData.status === 'completed') {
+    console.log('[YT Extension Popup] Progress monitoring completed');
+    return true;
+  }
+  if (progressData.status === 'error') {
+    setStatus(`❌ 处理出错: ${progressData.error}`);
+    showDetailedError('处理过程中遇到错误，请检查视频链接或稍后重试');
+    return true;
+  }
+  return false;
+}
+
+// Subscribe over the multiplexed WebSocket channel; fall back to polling if it cannot connect.
+// Returns a function that stops monitoring (called once the job itself has finished).
 function startProgressMonitoring(apiBase, videoId) {
   console.log('[YT Extension Popup] Starting progress monitoring for:', videoId);
-  
+
+  let socket;
+  let stopPolling = null;
+  try {
+    socket = new WebSocket(`${apiBase.replace(/^http/, 'ws')}/ws/progress`);
+  } catch (error) {
+    return startProgressPolling(apiBase, videoId);
+  }
+
+  let opened = false;
+  let jobId = null;
+  let progressData = {};
+
+  // Clean up after 5 minutes max
+  const timeout = setTimeout(() => {
+    socket.close();
+    console.log('[YT Extension Popup] Progress monitoring timeout');
+  }, 300000);
+
+  socket.onopen = () => {
+    opened = true;
+    socket.send(JSON.stringify({ action: 'subscribe', ids: [videoId] }));
+  };
+
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type !== 'progress') return;
+    if (message.job_id !== jobId) {
+      jobId = message.job_id;
+      progressData = {};
+    }
+    // Messages carry only changed fields; merge them into the last known record
+    Object.assign(progressData, message.changes);
+    console.log('[YT Extension Popup] Progress update:', progressData);
+    if (renderProgress(progressData)) {
+      clearTimeout(timeout);
+      socket.close();
+    }
+  };
+
+  let stopped = false;
+  socket.onclose = () => {
+    if (!opened && !stopped) {
+      clearTimeout(timeout);
+      console.log('[YT Extension Popup] Progress socket unavailable, falling back to polling');
+      stopPolling = startProgressPolling(apiBase, videoId);
+    }
+  };
+
+  return () => {
+    stopped = true;
+    clearTimeout(timeout);
+    socket.close();
+    if (stopPolling) stopPolling();
+  };
+}
+
+function startProgressPolling(apiBase, videoId) {
   let consecutiveErrors = 0;
   const maxConsecutiveErrors = 3;
+  // The endpoint returns the video's latest record, which may be a finished earlier run;
+  // only a run seen processing here can end monitoring
+  let activeJobId = null;
   
-  // Poll progress every 2 seconds
+  // Poll progress every 1.5 seconds
   const progressInterval = setInterval(async () => {
     try {
       const progressUrl = `${apiBase}/api/progress/${encodeURIComponent(videoId)}`;
@@ -243,18 +362,13 @@ function startProgressMonitoring(apiBase, videoId) {
         console.log('[YT Extension Popup] Progress update:', progressData);
         consecutiveErrors = 0; // Reset error counter
         
-        // Update status with progress
         if (progressData.status === 'processing') {
-          const progressBar = '█'.repeat(Math.floor(progressData.progress / 10)) + '░'.repeat(10 - Math.floor(progressData.progress / 10));
-          const progressText = `🔄 ${progressData.current_step}\n${progressBar} ${progressData.progress}%`;
-          setStatus(progressText);
-        } else if (progressData.status === 'completed') {
-          clearInterval(progressInterval);
-          console.log('[YT Extension Popup] Progress monitoring completed');
-        } else if (progressData.status === 'error') {
+          activeJobId = progressData.job_id;
+        } else if (progressData.job_id !== activeJobId) {
+          return; // stale record from a previous run
+        }
+        if (renderProgress(progressData)) {
           clearInterval(progressInterval);
-          setStatus(`❌ 处理出错: ${progressData.error}`);
-          showDetailedError('处理过程中遇到错误，请检查视频链接或稍后重试');
         }
       } else if (response.status === 404) {
         // Progress not found - either completed very quickly or cleaned up
@@ -275,10 +389,15 @@ function startProgressMonitoring(apiBase, videoId) {
   }, 1500); // Poll every 1.5 seconds for more responsive UI
   
   // Clean up after 5 minutes max
-  setTimeout(() => {
+  const timeout = setTimeout(() => {
     clearInterval(progressInterval);
     console.log('[YT Extension Popup] Progress monitoring timeout');
   }, 300000);
+
+  return () => {
+    clearInterval(progressInterval);
+    clearTimeout(timeout);
+  };
 }
 
 function escapeHtml(str) { return str?.replace(/[&<>"']/g, s => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;','\'':'&#39;'}[s])) || ''; }
@@ -25,8 +25,8 @@ print(f"🔑 OpenAI API Key: {'✅ 已配置' if OPENAI_API_KEY and OPENAI_API_K
 
 # 初始化OpenAI客户端
 try:
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    from openai_client import get_openai_client
+    client = get_openai_client()
     print("✅ OpenAI 客户端初始化成功")
 except Exception as e:
     print(f"❌ OpenAI 客户端初始化失败: {e}")
@@ -176,14 +176,14 @@ def summarize_conclusions(transcript: str, lang: str = "zh") -> tuple[List[str],
     user_prompt = USER_TEMPLATE.format(lang=lang, transcript=transcript[:18000])
 
     try:
-        resp = client.chat.completions.create(
+        resp = client.call(lambda c: c.chat.completions.create(
             model=SUMMARY_MODEL,
             messages=[
                 {"role": "system", "content": sys_prompt},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.2,
-        )
+        ))
         text = resp.choices[0].message.content.strip()
         print(f"✅ AI总结完成")
 
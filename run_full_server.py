@@ -36,13 +36,18 @@ print(f"📁 临时目录: {TMP_DIR}")
 
 # 尝试导入和初始化OpenAI客户端
 try:
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    from openai_client import get_openai_client
+    client = get_openai_client()
     print("✅ OpenAI 客户端初始化成功")
 except Exception as e:
     print(f"❌ OpenAI 客户端初始化失败: {e}")
     client = None
 
+# 音频转码配置（speech: 单声道 16kHz Opus，上传体积最小）
+from audio import get_audio_profile, ytdlp_audio_options
+AUDIO_PROFILE = get_audio_profile(os.getenv("AUDIO_PROFILE", "speech"))
+print(f"🎧 Audio Profile: {AUDIO_PROFILE.name}")
+
 # 导入提示词模板
 try:
     from prompts import SYSTEM_SUMMARY, USER_TEMPLATE
@@ -88,11 +93,7 @@ def download_audio_by_video_id(video_id: str, out_dir: Path) -> Path:
         "retry_sleep_functions": {"http": lambda n: min(4 * n, 60)},
         # 使用cookies（如果有的话）
         "cookiefile": None,
-        "postprocessors": [{
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": "mp3",
-            "preferredquality": "192"
-        }]
+        **ytdlp_audio_options(AUDIO_PROFILE),
     }
     
     print(f"🎵 开始下载音频: {url}")
@@ -102,7 +103,9 @@ def download_audio_by_video_id(video_id: str, out_dir: Path) -> Path:
         if not audio_path.exists():
             # 兜底查找
             for f in out_dir.glob(f"{info['id']}.*"):
-                if f.suffix.lower() in {'.m4a', '.mp3', '.webm'}:
+                if f.suffix.lower() == '.opus':
+                    f = f.rename(f.with_suffix('.ogg'))  # Whisper 只接受 .ogg 扩展名
+                if f.suffix.lower() in {'.m4a', '.mp3', '.webm', '.ogg'}:
                     print(f"✅ 音频下载成功: {f}")
                     return f
             raise FileNotFoundError("音频文件未找到")
@@ -115,13 +118,12 @@ def transcribe_whisper(file_path: Path) -> str:
         raise HTTPException(status_code=500, detail="OpenAI客户端未初始化")
     
     print(f"🎤 开始转录音频: {file_path}")
-    with open(file_path, "rb") as f:
-        transcription = client.audio.transcriptions.create(
-            model=WHISPER_MODEL,
-            file=f,
-            temperature=0,
-            response_format="json"
-        )
+    transcription = client.call(lambda c: c.audio.transcriptions.create(
+        model=WHISPER_MODEL,
+        file=file_path,
+        temperature=0,
+        response_format="json"
+    ))
     
     transcript = transcription.text
     print(f"✅ 转录完成，长度: {len(transcript)} 字符")
@@ -137,14 +139,14 @@ def summarize_conclusions(transcript: str, lang: str = "zh") -> tuple[List[str],
     sys_prompt = SYSTEM_SUMMARY
     user_prompt = USER_TEMPLATE.format(lang=lang, transcript=transcript[:18000])  # 防止超长
 
-    resp = client.chat.completions.create(
+    resp = client.call(lambda c: c.chat.completions.create(
         model=SUMMARY_MODEL,
         messages=[
             {"role": "system", "content": sys_prompt},
             {"role": "user", "content": user_prompt}
         ],
         temperature=0.2,
-    )
+    ))
     text = resp.choices[0].message.content.strip()
     print(f"✅ AI总结完成")
 
@@ -6,21 +6,51 @@ import hashlib
 import json
 import time
 import asyncio
+import threading
+import uuid
+import itertools
+import re
+import sqlite3
+import queue
+import subprocess
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable, Iterator
 
-from fastapi import FastAPI, Query, BackgroundTasks
+from fastapi import FastAPI, Query, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from yt_dlp import YoutubeDL
 
-from openai import OpenAI
 try:
-    from .prompts import SYSTEM_SUMMARY, USER_TEMPLATE
+    from .prompts import SYSTEM_SUMMARY, USER_TEMPLATE, SYSTEM_CHUNK_NOTES, CHUNK_TEMPLATE
+    from .cache_store import CacheBackend, LRUCache, create_cache_backend
+    from .audio_cache import AudioCache
+    from .progress_store import ProgressStore, InMemoryProgressStore, FINISHED_STATUSES
+    from .openai_client import OpenAIClientConfig, SharedOpenAIClient, classify_openai_error, get_openai_client
+    from .rate_limiter import BATCH, ModelLimits, RateLimitScheduler, bind_priority, request_priority
+    from .hedging import HedgeStats, measured, run_hedged
+    from .job_queue import SQLiteJobQueue
+    from .captions import YtDlpCaptionExtractor, fetch_caption_transcript
+    from .audio import AudioSegment, download_audio, get_audio_profile, resolve_stream_url, stream_segments
+    from .audio_worker import SilenceSettings, acquire_and_prepare, prepare_segments, warm_up
 except ImportError:
-    from prompts import SYSTEM_SUMMARY, USER_TEMPLATE
+    from prompts import SYSTEM_SUMMARY, USER_TEMPLATE, SYSTEM_CHUNK_NOTES, CHUNK_TEMPLATE
+    from cache_store import CacheBackend, LRUCache, create_cache_backend
+    from audio_cache import AudioCache
+    from progress_store import ProgressStore, InMemoryProgressStore, FINISHED_STATUSES
+    from openai_client import OpenAIClientConfig, SharedOpenAIClient, classify_openai_error, get_openai_client
+    from rate_limiter import BATCH, ModelLimits, RateLimitScheduler, bind_priority, request_priority
+    from hedging import HedgeStats, measured, run_hedged
+    from job_queue import SQLiteJobQueue
+    from captions import YtDlpCaptionExtractor, fetch_caption_transcript
+    from audio import AudioSegment, download_audio, get_audio_profile, resolve_stream_url, stream_segments
+    from audio_worker import SilenceSettings, acquire_and_prepare, prepare_segments, warm_up
 
 load_dotenv()
 
@@ -34,22 +64,122 @@ TMP_DIR.mkdir(parents=True, exist_ok=True)
 CACHE_DIR = Path(os.getenv("CACHE_DIR", "./cache"))
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))  # 24 hours default
+# Persistent cache backend: json (one file per entry) or sqlite (indexed, size-capped)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "json")
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "0"))  # 0 = unlimited (sqlite only)
+CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "600"))  # seconds, 0 disables
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "gzip")  # none, gzip or zstd
+# In-process LRU tier in front of the persistent cache
+CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", "512"))
+CACHE_MEMORY_MB = int(os.getenv("CACHE_MEMORY_MB", "64"))
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Map-reduce summarization for transcripts longer than the single-call limit
+SUMMARY_MAP_THRESHOLD = int(os.getenv("SUMMARY_MAP_THRESHOLD", "18000"))  # characters
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
 
-# Progress tracking
-progress_store: Dict[str, Dict[str, Any]] = {}
+# Caption fast path: use existing subtitle tracks instead of downloading and transcribing audio
+CAPTIONS_ENABLED = os.getenv("CAPTIONS_ENABLED", "true").lower() == "true"
+
+# Audio profile for Whisper uploads: speech (mono 16 kHz Opus), mp3 (128 kbps) or native (no re-encode)
+AUDIO_PROFILE = get_audio_profile(os.getenv("AUDIO_PROFILE", "speech"))
+# Upper bound for segment length; the actual length is derived from the audio bitrate
+MAX_SEGMENT_SECONDS = int(os.getenv("MAX_SEGMENT_SECONDS", "1800"))
+
+# Silence trimming: drop long non-speech spans and cut segments inside pauses
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+VAD_NOISE_DB = float(os.getenv("VAD_NOISE_DB", "-35"))      # below this level counts as silence
+VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", "2.0"))  # silences longer than this are dropped
+VAD_PADDING = float(os.getenv("VAD_PADDING", "0.3"))        # seconds kept on each side of a dropped silence
+SILENCE_SETTINGS = SilenceSettings(VAD_NOISE_DB, VAD_MIN_SILENCE, VAD_PADDING) if VAD_ENABLED else None
+
+# Optional downloaded-audio cache, separate from the transcript cache (0 MB disables it)
+AUDIO_CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", "./audio_cache"))
+AUDIO_CACHE_MAX_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "0"))
+
+# Worker processes for audio download, probing and segmentation (0 runs them on the request threads)
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "0"))
+
+# Maximum number of audio segments uploaded to Whisper at the same time
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", "4"))
+# Hedging: duplicate a segment request once it runs past the given latency quantile of its peers
+WHISPER_HEDGING = os.getenv("WHISPER_HEDGING", "false").lower() == "true"
+WHISPER_HEDGE_MIN_SAMPLES = int(os.getenv("WHISPER_HEDGE_MIN_SAMPLES", "3"))
+WHISPER_HEDGE_QUANTILE = float(os.getenv("WHISPER_HEDGE_QUANTILE", "0.95"))
+whisper_hedge_stats = HedgeStats()
+
+# Streaming pipeline: transcribe fixed-length chunks while the audio is still downloading
+STREAMING_PIPELINE = os.getenv("STREAMING_PIPELINE", "false").lower() == "true"
+STREAM_SEGMENT_SECONDS = int(os.getenv("STREAM_SEGMENT_SECONDS", "300"))
+# Bounds finished chunks handed to Whisper, not disk use: ffmpeg keeps writing segment files at
+# download speed, so TMP_DIR can hold up to the whole (encoded) audio while Whisper is behind
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "2"))
+
+# Progress records expire PROGRESS_TTL seconds after their job finishes
+PROGRESS_TTL = int(os.getenv("PROGRESS_TTL", "3600"))
+PROGRESS_MAX_ENTRIES = int(os.getenv("PROGRESS_MAX_ENTRIES", "1000"))
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))  # keep-alive comment on idle streams
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "1000"))  # per WebSocket connection
+
+# Job worker pool configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "50"))  # queued jobs beyond running ones
+JOBS_DB_PATH = Path(os.getenv("JOBS_DB_PATH", "./jobs.db"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # restarts a running job may survive
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))  # keep finished jobs (seconds)
+
+# Batch summarization: a separate pool so large batches never starve interactive jobs
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_MAX_VIDEOS = int(os.getenv("BATCH_MAX_VIDEOS", "200"))
+
+# Rate limits per model (requests and tokens / audio seconds per minute; 0 disables a limit)
+WHISPER_RPM = float(os.getenv("WHISPER_RPM", "50"))
+WHISPER_AUDIO_SECONDS_PER_MINUTE = float(os.getenv("WHISPER_AUDIO_SECONDS_PER_MINUTE", "0"))
+SUMMARY_RPM = float(os.getenv("SUMMARY_RPM", "500"))
+SUMMARY_TPM = float(os.getenv("SUMMARY_TPM", "200000"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+SUMMARY_OUTPUT_TOKENS = 1000  # completion budget counted against TPM up front
+
+# Clients, databases and caches are opened by the open_resources startup hook, not at import:
+# spawned audio workers re-import this module (as __mp_main__) and must not start any of them
+openai_client: Optional[SharedOpenAIClient] = None
+rate_limiter = RateLimitScheduler(
+    {
+        WHISPER_MODEL: ModelLimits(WHISPER_RPM, WHISPER_AUDIO_SECONDS_PER_MINUTE),
+        SUMMARY_MODEL: ModelLimits(SUMMARY_RPM, SUMMARY_TPM),
+    },
+    classify=classify_openai_error,
+    max_retries=RATE_LIMIT_MAX_RETRIES,
+)
+
+def openai_request(model: str, units: float, fn):
+    """OpenAI call admitted by the rate limiter at the calling thread's priority"""
+    def call():
+        with measured():  # hedging times the API call only, not the limiter queue or retry sleeps
+            return openai_client.call(fn)
+    return rate_limiter.run(model, units, call)
+
+def _chat_units(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages) + SUMMARY_OUTPUT_TOKENS
+
+cache_backend: Optional[CacheBackend] = None
+memory_cache = LRUCache(CACHE_MEMORY_ENTRIES, CACHE_MEMORY_MB * 1024 * 1024, CACHE_TTL)
+audio_cache: Optional[AudioCache] = None  # stays None when AUDIO_CACHE_MAX_MB is 0
+
+# Progress tracking: records keyed by job id, indexed by video_id, expiring after completion
+progress_store: ProgressStore = InMemoryProgressStore(PROGRESS_TTL, PROGRESS_MAX_ENTRIES)
 
 class ProgressTracker:
-    def __init__(self, video_id: str):
+    def __init__(self, video_id: str, job_id: Optional[str] = None):
         self.video_id = video_id
+        self.job_id = job_id or uuid.uuid4().hex
         self.steps = []
         self.current_step = 0
         self.total_steps = 0
         self.status = "starting"
-        self.error = None
+        self.error_message = None
         
-        progress_store[video_id] = {
+        progress_store.create(self.job_id, {
             "video_id": video_id,
             "status": "starting",
             "progress": 0,
@@ -57,7 +187,7 @@ class ProgressTracker:
             "steps": [],
             "error": None,
             "timestamp": time.time()
-        }
+        })
     
     def add_step(self, step_name: str):
         self.steps.append(step_name)
@@ -71,33 +201,36 @@ class ProgressTracker:
         current_step_name = step_name or (self.steps[self.current_step - 1] if self.current_step > 0 else "处理中...")
         progress = min(100, int((self.current_step / max(self.total_steps, 1)) * 100))
         
-        progress_store[self.video_id].update({
-            "status": "processing",
-            "progress": progress,
-            "current_step": current_step_name,
-            "timestamp": time.time()
-        })
+        progress_store.update(
+            self.job_id,
+            status="processing",
+            progress=progress,
+            current_step=current_step_name,
+            timestamp=time.time()
+        )
         print(f"📈 Progress {self.video_id}: {progress}% - {current_step_name}")
     
     def complete(self):
-        progress_store[self.video_id].update({
-            "status": "completed",
-            "progress": 100,
-            "current_step": "完成",
-            "timestamp": time.time()
-        })
+        progress_store.update(
+            self.job_id,
+            status="completed",
+            progress=100,
+            current_step="完成",
+            timestamp=time.time()
+        )
         print(f"✅ Completed {self.video_id}")
     
     def error(self, error_msg: str):
-        progress_store[self.video_id].update({
-            "status": "error",
-            "error": error_msg,
-            "timestamp": time.time()
-        })
+        progress_store.update(
+            self.job_id,
+            status="error",
+            error=error_msg,
+            timestamp=time.time()
+        )
         print(f"❌ Error {self.video_id}: {error_msg}")
     
     def update_progress(self):
-        progress_store[self.video_id]["steps"] = self.steps
+        progress_store.update(self.job_id, steps=list(self.steps))
 
 app = FastAPI()
 app.add_middleware(
@@ -108,245 +241,421 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def open_resources():
+    """Open clients and stores; registered first so later startup hooks can use them"""
+    global openai_client, cache_backend, audio_cache, job_queue
+    # 429s and transient errors are retried by the rate limiter, not inside the SDK
+    openai_client = get_openai_client(OpenAIClientConfig.from_env()._replace(max_retries=0))
+    cache_backend = create_cache_backend(CACHE_BACKEND, CACHE_DIR, CACHE_TTL, CACHE_MAX_MB * 1024 * 1024,
+                                         CACHE_COMPRESSION)
+    if AUDIO_CACHE_MAX_MB > 0:
+        audio_cache = AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB * 1024 * 1024)
+    job_queue = SQLiteJobQueue(JOBS_DB_PATH, max_attempts=JOB_MAX_ATTEMPTS)
+
 class SummaryResp(BaseModel):
     video_id: str
     conclusions: List[str]
     summary: str
     transcript_preview: str
 
+class JobRequest(BaseModel):
+    video_id: str
+    lang: str = "zh"
+
+class BatchRequest(BaseModel):
+    video_ids: List[str] = []
+    playlist_url: Optional[str] = None
+    lang: str = "zh"
+
 
 def download_audio_by_video_id(video_id: str, out_dir: Path) -> Path:
     """Enhanced YouTube download with anti-bot bypass strategies"""
-    url = f"https://www.youtube.com/watch?v={video_id}"
-    
-    # TODO(human): Implement robust download strategy with cookies support and fallback mechanisms
-    # Requirements:
-    # 1. Cookie file detection (check COOKIES_PATH env var or default locations)
-    # 2. Realistic User-Agent and browser headers for anti-bot bypass
-    # 3. Multi-tier fallback strategy: basic → cookies → enhanced → demo mode
-    # 4. Smart error handling that identifies anti-bot vs network issues
-    # 5. Return appropriate exceptions for different failure types
-    
-    # Base configuration with flexible audio formats
-    base_opts = {
-        "format": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[height<=480]",
-        "outtmpl": str(out_dir / f"%(id)s.%(ext)s"),
-        "noplaylist": True,
+    return download_audio(video_id, out_dir, AUDIO_PROFILE, os.getenv("COOKIES_PATH", "cookies.txt"))
+
+def resolve_audio_stream(video_id: str) -> Tuple[str, Dict[str, str], str]:
+    """Resolve the direct audio URL and request headers without downloading"""
+    cookies_path = os.getenv("COOKIES_PATH", "cookies.txt")
+    if audio_pool is not None:
+        return run_in_audio_pool(resolve_stream_url, video_id, cookies_path)
+    return resolve_stream_url(video_id, cookies_path)
+
+def expand_playlist(playlist_url: str) -> List[str]:
+    """List the video ids of a playlist or channel URL without resolving each video"""
+    opts = {
+        "extract_flat": "in_playlist",
+        "skip_download": True,
         "quiet": True,
         "no_warnings": True,
         "cachedir": False,
-        "extract_flat": False,
-        "writethumbnail": False,
-        "writeinfojson": False,
-        "postprocessors": [{
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": "mp3",
-            "preferredquality": "128"
-        }]
     }
-    
-    # Strategy 1: Basic attempt
-    try:
-        with YoutubeDL(base_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            return _find_audio_file(out_dir, info['id'])
-    except Exception as e:
-        print(f"Basic download failed: {e}")
-    
-    # Strategy 2: Enhanced with cookies and realistic headers
     cookies_path = os.getenv("COOKIES_PATH", "cookies.txt")
-    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    
-    enhanced_opts = base_opts.copy()
-    enhanced_opts.update({
-        "http_headers": {
-            "User-Agent": user_agent,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-        }
-    })
-    
-    # Try with cookies if available
     if os.path.exists(cookies_path):
-        enhanced_opts["cookiefile"] = cookies_path
-        print(f"Using cookies from {cookies_path}")
-        try:
-            with YoutubeDL(enhanced_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return _find_audio_file(out_dir, info['id'])
-        except Exception as e:
-            print(f"Enhanced download with cookies failed: {e}")
-    else:
-        print(f"No cookies file found at {cookies_path}")
-    
-    # Strategy 3: Try enhanced headers without cookies
+        opts["cookiefile"] = cookies_path
+
     try:
-        with YoutubeDL(enhanced_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            return _find_audio_file(out_dir, info['id'])
+        with YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(playlist_url, download=False)
     except Exception as e:
-        print(f"Enhanced headers download failed: {e}")
-    
-    # Strategy 4: Fallback to demo mode
-    raise RuntimeError(f"YouTube download failed for video {video_id} - all strategies exhausted")
-
-def _find_audio_file(out_dir: Path, video_id: str) -> Path:
-    """Helper to find downloaded audio file"""
-    audio_path = out_dir / f"{video_id}.mp3"
-    if audio_path.exists():
-        return audio_path
-    
-    # 兜底查找
-    for f in out_dir.glob(f"{video_id}.*"):
-        if f.suffix.lower() in {'.m4a', '.mp3', '.webm'}:
-            return f
-    raise FileNotFoundError("音频文件未找到")
+        raise RuntimeError(f"Could not expand playlist {playlist_url}: {e}")
 
+    entries = info.get("entries") or [info]
+    return [entry["id"] for entry in entries if entry and entry.get("id")]
 
-def get_audio_duration(file_path: Path) -> float:
-    """Get audio duration in seconds using ffprobe"""
-    import subprocess
-    try:
-        result = subprocess.run([
-            'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-            '-of', 'csv=p=0', str(file_path)
-        ], capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
-    except (subprocess.CalledProcessError, ValueError):
-        return 0.0
-
-def split_audio_file(file_path: Path, segment_duration: int = 600) -> List[Path]:
-    """Split audio file into segments for long videos (default: 10 minutes)"""
-    import subprocess
-    
-    duration = get_audio_duration(file_path)
-    if duration <= segment_duration:
-        return [file_path]  # No need to split
-    
-    segments = []
-    segment_count = int(duration // segment_duration) + 1
-    
-    for i in range(segment_count):
-        start_time = i * segment_duration
-        segment_file = file_path.with_name(f"{file_path.stem}_segment_{i}{file_path.suffix}")
-        
-        cmd = [
-            'ffmpeg', '-i', str(file_path),
-            '-ss', str(start_time), '-t', str(segment_duration),
-            '-c', 'copy', '-avoid_negative_ts', 'make_zero',
-            str(segment_file), '-y'
-        ]
-        
+def acquire_audio(video_id: str, work_dir: Path) -> Path:
+    """Get the video's audio into work_dir, reusing the audio cache when enabled"""
+    if audio_cache is None:
+        return download_audio_by_video_id(video_id, work_dir)
+    return audio_cache.checkout(
+        video_id, AUDIO_PROFILE.name, work_dir,
+        lambda staging: download_audio_by_video_id(video_id, staging)
+    )
+
+class AudioWorkerError(Exception):
+    """The audio worker pool broke twice in a row (not a RuntimeError, so no demo fallback)"""
+
+def _create_audio_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: this process already runs threads (OpenAI client loop, job workers)
+    return ProcessPoolExecutor(max_workers=AUDIO_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+audio_pool: Optional[ProcessPoolExecutor] = None  # created by start_audio_workers when AUDIO_WORKERS > 0
+audio_pool_lock = threading.Lock()
+
+def run_in_audio_pool(fn, *args):
+    """Run fn(*args) in an audio worker process, replacing the pool once if a worker died"""
+    global audio_pool
+    for attempt in range(2):
+        pool = audio_pool
         try:
-            subprocess.run(cmd, capture_output=True, check=True)
-            segments.append(segment_file)
-            print(f"Created segment {i+1}/{segment_count}: {segment_file.name}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to create segment {i}: {e}")
-            break
-    
-    return segments
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool as e:
+            with audio_pool_lock:
+                if audio_pool is pool:
+                    print(f"⚠️ Audio worker pool broken ({e}), restarting it")
+                    audio_pool = _create_audio_pool()
+            if attempt:
+                raise AudioWorkerError(f"Audio worker crashed twice: {e}")
 
-def transcribe_whisper(file_path: Path) -> str:
-    """Enhanced Whisper transcription with segment support"""
-    duration = get_audio_duration(file_path)
-    print(f"🎵 Audio duration: {duration:.1f}s")
-    
-    # For long videos (>10 minutes), use segmentation
-    if duration > 600:
-        print(f"🔄 Processing long video in segments...")
-        segments = split_audio_file(file_path, segment_duration=600)
-        transcriptions = []
+def acquire_segments(video_id: str, work_dir: Path, start: float = 0.0) -> List[AudioSegment]:
+    """Download and segment the video's audio (from ``start`` on), in the audio worker pool when configured"""
+    if audio_pool is None:
+        audio_file = acquire_audio(video_id, work_dir)
+        return prepare_segments(audio_file, AUDIO_PROFILE.name, MAX_SEGMENT_SECONDS, SILENCE_SETTINGS, start).segments
+
+    prepared = run_in_audio_pool(
+        acquire_and_prepare, video_id, work_dir, AUDIO_PROFILE.name, MAX_SEGMENT_SECONDS, SILENCE_SETTINGS,
+        os.getenv("COOKIES_PATH", "cookies.txt"),
+        AUDIO_CACHE_DIR if audio_cache is not None else None, AUDIO_CACHE_MAX_MB * 1024 * 1024, start
+    )
+    if audio_cache is not None and prepared.cache_hit is not None:
+        audio_cache.record(prepared.cache_hit)
+    return prepared.segments
+
+
+class TranscriptionError(Exception):
+    """Raised when some audio segments could not be transcribed"""
+    def __init__(self, failures: Dict[int, str], total: int):
+        self.failures = failures
+        self.total = total
+        details = "; ".join(f"segment {i}: {err}" for i, err in sorted(failures.items()))
+        super().__init__(f"{len(failures)}/{total} segments failed to transcribe ({details})")
+
+def _transcribe_segment(segment: AudioSegment) -> str:
+    """Transcribe one segment of a longer video"""
+    transcription = openai_request(WHISPER_MODEL, segment.end - segment.start, lambda c: c.audio.transcriptions.create(
+        model=WHISPER_MODEL,
+        file=segment.path,
+        temperature=0.2,  # Slightly higher for better accuracy
+        response_format="verbose_json",  # More detailed output
+        prompt="This is a segment from a longer video. Please provide accurate transcription."
+    ))
+    return transcription.text
+
+def _discard_segment(segment: AudioSegment) -> None:
+    """Clean up a segment file once no attempt needs it anymore"""
+    try:
+        segment.path.unlink()
+    except OSError:
+        pass
+
+def _segment_checkpoint_key(video_id: str, index: int, segment: AudioSegment) -> str:
+    # Boundaries are part of the key so a different segmentation never reuses stale text
+    return get_cache_key(
+        f"segment:{video_id}:{AUDIO_PROFILE.name}:{WHISPER_MODEL}:{index}:{segment.start:.1f}-{segment.end:.1f}"
+    )
+
+def _transcribe_checkpointed(video_id: Optional[str], index: int, segment: AudioSegment) -> str:
+    """Transcribe a segment, persisting its text as soon as it completes so retries can skip it"""
+    if video_id is None:
+        return _transcribe_segment(segment)
+
+    cache_key = _segment_checkpoint_key(video_id, index, segment)
+    checkpoint = read_cache_entry(cache_key)
+    if checkpoint is not None:
+        print(f"♻️ Reusing checkpointed segment {index} for video {video_id}")
+        return checkpoint['text']
+
+    text = _transcribe_segment(segment)
+    write_cache_entry(cache_key, {
+        'video_id': video_id,
+        'index': index,
+        'profile': AUDIO_PROFILE.name,
+        'text': text,
+    })
+    return text
+
+def transcribe_segments(segments: List[AudioSegment], video_id: Optional[str] = None) -> str:
+    """Enhanced Whisper transcription with concurrent, checkpointed segment support"""
+    if len(segments) > 1:
+        transcriptions: List[Optional[str]] = [None] * len(segments)
+        failures: Dict[int, str] = {}
         
-        for i, segment in enumerate(segments):
-            try:
-                print(f"📝 Transcribing segment {i+1}/{len(segments)}")
-                with open(segment, "rb") as f:
-                    transcription = client.audio.transcriptions.create(
-                        model=WHISPER_MODEL,
-                        file=f,
-                        temperature=0.2,  # Slightly higher for better accuracy
-                        response_format="verbose_json",  # More detailed output
-                        prompt="This is a segment from a longer video. Please provide accurate transcription."
-                    )
-                transcriptions.append(transcription.text)
-                
-                # Clean up segment file
-                try:
-                    segment.unlink()
-                except:
-                    pass
-                    
-            except Exception as e:
-                print(f"❌ Error transcribing segment {i}: {e}")
-                continue
+        # Slow segments get a duplicate request once they pass the p95 latency of finished ones
+        results = run_hedged(
+            bind_priority(lambda i, segment: _transcribe_checkpointed(video_id, i, segment)),
+            segments,
+            workers=min(WHISPER_CONCURRENCY, len(segments)),
+            hedging=WHISPER_HEDGING,
+            min_samples=WHISPER_HEDGE_MIN_SAMPLES,
+            quantile=WHISPER_HEDGE_QUANTILE,
+            stats=whisper_hedge_stats,
+            on_settled=lambda i: _discard_segment(segments[i]),
+            # Duplicates would only queue behind the limiter and spend budget
+            can_hedge=lambda: not rate_limiter.congested(WHISPER_MODEL),
+        )
+        for i, text, error in results:
+            if error is None:
+                transcriptions[i] = text
+                print(f"📝 Transcribed segment {i+1}/{len(segments)}")
+            else:
+                failures[i] = str(error)
+                print(f"❌ Error transcribing segment {i}: {error}")
         
+        if failures:
+            raise TranscriptionError(failures, len(segments))
         return " ".join(transcriptions)
     else:
         # Standard processing for shorter videos
         print(f"📝 Transcribing audio file...")
-        with open(file_path, "rb") as f:
-            transcription = client.audio.transcriptions.create(
-                model=WHISPER_MODEL,
-                file=f,
-                temperature=0.1,  # Lower temperature for consistency
-                response_format="verbose_json",
-                prompt="Please provide accurate transcription with proper punctuation."
-            )
+        segment = segments[0]
+        transcription = openai_request(WHISPER_MODEL, segment.end - segment.start, lambda c: c.audio.transcriptions.create(
+            model=WHISPER_MODEL,
+            file=segment.path,
+            temperature=0.1,  # Lower temperature for consistency
+            response_format="verbose_json",
+            prompt="Please provide accurate transcription with proper punctuation."
+        ))
         return transcription.text
 
 
+def transcribe_streaming(video_id: str, work_dir: Path, progress: Optional[ProgressTracker] = None) -> str:
+    """Download, segment and transcribe as one overlapped pipeline
+
+    ffmpeg cuts the remote stream into STREAM_SEGMENT_SECONDS chunks; each
+    finished chunk goes through a bounded queue to Whisper workers while the
+    rest of the audio is still downloading. The queue bounds in-flight work
+    only: ffmpeg is not throttled, so segment files pile up in work_dir when
+    transcription falls behind (each is deleted once transcribed).
+    """
+    source_url, headers, source_ext = resolve_audio_stream(video_id)
+    segment_queue: "queue.Queue[Optional[Tuple[int, AudioSegment]]]" = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    transcriptions: Dict[int, str] = {}
+    failures: Dict[int, str] = {}
+    started = time.time()
+
+    def worker():
+        while True:
+            item = segment_queue.get()
+            if item is None:
+                break
+            i, segment = item
+            try:
+                transcriptions[i] = _transcribe_checkpointed(video_id, i, segment)
+                if len(transcriptions) == 1:
+                    print(f"⚡ First transcript text after {time.time() - started:.1f}s")
+            except Exception as e:
+                failures[i] = str(e)
+                print(f"❌ Error transcribing streamed segment {i}: {e}")
+            finally:
+                _discard_segment(segment)
+
+    workers = [threading.Thread(target=bind_priority(worker), name=f"stream-whisper-{n}", daemon=True)
+               for n in range(max(1, WHISPER_CONCURRENCY))]
+    for t in workers:
+        t.start()
+
+    total = 0
+    streamed_until = 0.0
+    stream_error: Optional[Exception] = None
+    try:
+        for segment in stream_segments(source_url, work_dir, STREAM_SEGMENT_SECONDS, http_headers=headers,
+                                       profile=AUDIO_PROFILE, source_ext=source_ext):
+            print(f"📦 Streamed segment {total + 1} ready ({segment.start:.0f}s–{segment.end:.0f}s)")
+            segment_queue.put((total, segment))  # blocks while Whisper is behind
+            total += 1
+            streamed_until = segment.end
+            if total == 1 and progress is not None:
+                progress.next_step("音频转录")
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        if total == 0:
+            raise  # nothing streamed yet: the caller falls back to a full download
+        stream_error = e
+    finally:
+        for _ in workers:
+            segment_queue.put(None)
+        for t in workers:
+            t.join()
+
+    if failures:
+        raise TranscriptionError(failures, total)
+    transcript = " ".join(transcriptions[i] for i in range(total))
+    if stream_error is None:
+        return transcript
+
+    # Keep what was streamed and only download/transcribe the rest, so finished segments are not paid twice
+    print(f"⚠️ Stream stopped at {streamed_until:.0f}s ({stream_error}), fetching the remaining audio")
+    rest = acquire_segments(video_id, work_dir, start=streamed_until)
+    if not rest:
+        return transcript
+    return f"{transcript} {transcribe_segments(rest, video_id=video_id)}"
+
+
+def get_caption_transcript(video_id: str, lang: str) -> Optional[str]:
+    """Try the caption fast path; None means fall back to audio download + Whisper"""
+    if not CAPTIONS_ENABLED:
+        return None
+
+    cookies_path = os.getenv("COOKIES_PATH", "cookies.txt")
+    extractor = YtDlpCaptionExtractor(cookies_path if os.path.exists(cookies_path) else None)
+    try:
+        return fetch_caption_transcript(video_id, lang, extractor=extractor)
+    except Exception as e:
+        print(f"⚠️ Caption lookup failed for video {video_id}: {e}")
+        return None
+
+
 def get_cache_key(video_id: str) -> str:
     """Generate cache key for video"""
     return hashlib.md5(video_id.encode()).hexdigest()
 
-def get_cached_transcript(video_id: str) -> Optional[str]:
-    """Get cached transcript if available and not expired"""
-    cache_key = get_cache_key(video_id)
-    cache_file = CACHE_DIR / f"{cache_key}.json"
-    
-    if not cache_file.exists():
+def read_cache_entry(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Load a cache entry if available and not expired (memory tier first, then the backend)"""
+    cache_data = memory_cache.get(cache_key)
+    if cache_data is not None:
+        try:
+            cache_backend.touch(cache_key)  # keep hot keys recent for the backend's LRU size cap
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Failed to record cache access {cache_key}: {e}")
+        return cache_data
+
+    try:
+        entry = cache_backend.get(cache_key)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Failed to read cache entry {cache_key}: {e}")
+        return None
+    if entry is None:
         return None
+
+    cache_data, size = entry
+    memory_cache.put(cache_key, cache_data, size, cache_data.get('timestamp'))
+    return cache_data
+
+def write_cache_entry(cache_key: str, cache_data: Dict[str, Any]) -> bool:
+    """Write a cache entry through the memory tier to the backend, stamping it with the current time"""
+    cache_data = {**cache_data, 'timestamp': time.time()}
     
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        
-        # Check expiration
-        if time.time() - cache_data.get('timestamp', 0) > CACHE_TTL:
-            cache_file.unlink()  # Remove expired cache
-            return None
-        
-        print(f"📋 Using cached transcript for video {video_id}")
-        return cache_data.get('transcript')
-    
-    except (json.JSONDecodeError, KeyError, OSError):
-        # Remove corrupted cache
+        size = cache_backend.set(cache_key, cache_data)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Failed to write cache entry {cache_key}: {e}")
+        return False
+
+    memory_cache.put(cache_key, cache_data, size, cache_data['timestamp'])
+    return True
+
+def _cache_sweeper() -> None:
+    """Periodically purge expired entries and enforce CACHE_MAX_MB"""
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL)
         try:
-            cache_file.unlink()
-        except:
-            pass
+            removed = cache_backend.sweep()
+            if removed:
+                print(f"🧹 Cache sweep removed {removed} entries")
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Cache sweep failed: {e}")
+
+@app.on_event("startup")
+def start_cache_sweeper():
+    if CACHE_SWEEP_INTERVAL > 0:
+        threading.Thread(target=_cache_sweeper, name="cache-sweeper", daemon=True).start()
+
+@app.on_event("shutdown")
+def close_openai_client():
+    if openai_client is not None:
+        openai_client.close()
+
+@app.on_event("startup")
+def start_audio_workers():
+    """Spawn the audio worker processes now rather than on the first download"""
+    global audio_pool
+    if AUDIO_WORKERS > 0:
+        audio_pool = _create_audio_pool()
+        for _ in range(AUDIO_WORKERS):
+            audio_pool.submit(warm_up)
+        print(f"🎛️ Audio worker pool started with {AUDIO_WORKERS} process(es)")
+
+@app.on_event("shutdown")
+def stop_audio_workers():
+    if audio_pool is not None:
+        audio_pool.shutdown(wait=False)
+
+def get_cached_transcript(video_id: str) -> Optional[str]:
+    """Get cached transcript if available and not expired"""
+    cache_data = read_cache_entry(get_cache_key(video_id))
+    if cache_data is None:
         return None
+    
+    print(f"📋 Using cached transcript for video {video_id}")
+    return cache_data.get('transcript')
 
 def save_cached_transcript(video_id: str, transcript: str) -> None:
     """Save transcript to cache"""
-    cache_key = get_cache_key(video_id)
-    cache_file = CACHE_DIR / f"{cache_key}.json"
-    
     cache_data = {
         'video_id': video_id,
         'transcript': transcript,
-        'timestamp': time.time()
     }
-    
-    try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+    if write_cache_entry(get_cache_key(video_id), cache_data):
         print(f"💾 Cached transcript for video {video_id}")
-    except OSError as e:
-        print(f"⚠️ Failed to cache transcript: {e}")
+
+
+# Summary cache: keyed by language, model and prompt version so prompt edits invalidate old entries
+SUMMARY_PROMPT_VERSION = hashlib.sha1(
+    "\x00".join([SYSTEM_SUMMARY, USER_TEMPLATE, SYSTEM_CHUNK_NOTES, CHUNK_TEMPLATE]).encode()
+).hexdigest()[:12]
+
+def get_summary_cache_key(video_id: str, lang: str) -> str:
+    return get_cache_key(f"summary:{video_id}:{lang}:{SUMMARY_MODEL}:{SUMMARY_PROMPT_VERSION}")
+
+def get_cached_summary(video_id: str, lang: str) -> Optional[SummaryResp]:
+    """Get a cached final summary, skipping every model call on a hit"""
+    cache_data = read_cache_entry(get_summary_cache_key(video_id, lang))
+    if cache_data is None:
+        return None
+    
+    print(f"📋 Using cached summary for video {video_id} ({lang})")
+    return SummaryResp(**cache_data['summary'])
+
+def save_cached_summary(summary: SummaryResp, lang: str) -> None:
+    """Save final summary to cache"""
+    cache_data = {
+        'video_id': summary.video_id,
+        'lang': lang,
+        'model': SUMMARY_MODEL,
+        'prompt_version': SUMMARY_PROMPT_VERSION,
+        'summary': jsonable_encoder(summary),
+    }
+    if write_cache_entry(get_summary_cache_key(summary.video_id, lang), cache_data):
+        print(f"💾 Cached summary for video {summary.video_id} ({lang})")
 
 
 # Demo transcript templates for fallback
@@ -404,142 +713,871 @@ def root():
         "openai_configured": bool(OPENAI_API_KEY and OPENAI_API_KEY != "your_openai_api_key_here"),
         "endpoints": {
             "summarize": "/api/summarize?video_id=VIDEO_ID&lang=zh",
+            "summarize_stream": "/api/summarize/stream?video_id=VIDEO_ID&lang=zh",
             "progress": "/api/progress/{video_id}",
             "progress_stream": "/api/progress/{video_id}/stream",
+            "progress_socket": "ws /ws/progress",
+            "jobs": "POST /api/jobs",
+            "job_status": "/api/jobs/{job_id}",
+            "batch": "POST /api/batch",
+            "batch_status": "/api/batch/{batch_id}",
+            "batch_stream": "/api/batch/{batch_id}/stream",
+            "cache_stats": "/api/cache/stats",
+            "rate_limit_stats": "/api/rate_limits/stats",
+            "transcription_stats": "/api/transcription/stats",
             "docs": "/docs"
         }
     }
 
+@app.get("/api/rate_limits/stats")
+def rate_limit_stats():
+    """Per-model queue length, admitted calls, 429s and the current adaptive rate factor"""
+    return rate_limiter.stats()
+
+@app.get("/api/transcription/stats")
+def transcription_stats():
+    """How often Whisper segment calls were retried and hedged"""
+    whisper = rate_limiter.stats().get(WHISPER_MODEL, {})
+    return {
+        "segments": whisper_hedge_stats.snapshot(),
+        "retries": whisper.get("retries", 0),
+        "rate_limited": whisper.get("rate_limited", 0),
+    }
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Hit/miss/eviction counters for the in-memory tier plus backend size"""
+    return {
+        "memory": memory_cache.stats(),
+        "backend": cache_backend.stats(),
+        "audio": audio_cache.stats() if audio_cache else None,
+    }
+
 @app.get("/api/progress/{video_id}")
 def get_progress(video_id: str):
-    """Get current progress for a video"""
-    if video_id not in progress_store:
+    """Get current progress for the latest run of a video"""
+    progress_data = progress_store.latest_for_video(video_id)
+    if progress_data is None:
         return {"error": "Video not found or not being processed"}
     
-    return progress_store[video_id]
+    return progress_data
+
+def _queue_listener(updates: "asyncio.Queue[Dict[str, Any]]") -> Callable[[Dict[str, Any]], None]:
+    """Progress listener that hands records from worker threads to the running event loop"""
+    loop = asyncio.get_running_loop()
+
+    def listener(record: Dict[str, Any]) -> None:
+        try:
+            loop.call_soon_threadsafe(updates.put_nowait, record)
+        except RuntimeError:
+            pass  # event loop already closed
+
+    return listener
+
+def subscribe_progress(keys: List[str]) -> Tuple["asyncio.Queue[Dict[str, Any]]", Callable[[], None]]:
+    """Bridge progress store notifications (from worker threads) into an asyncio queue"""
+    updates: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    return updates, progress_store.subscribe(keys, _queue_listener(updates))
+
+def _sse_event(event: str, data: Dict[str, Any], event_id: int) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 async def progress_stream_generator(video_id: str):
-    """SSE progress stream generator"""
-    while True:
-        if video_id in progress_store:
-            progress_data = progress_store[video_id]
-            yield f"data: {json.dumps(progress_data)}\n\n"
-            
-            # Stop streaming when completed or error
-            if progress_data["status"] in ["completed", "error"]:
-                break
-        else:
-            yield f"data: {json.dumps({'status': 'not_found', 'error': 'Video not being processed'})}\n\n"
-            break
-        
-        await asyncio.sleep(1)  # Update every second
+    """SSE progress stream: pushes an event on every progress change, heartbeats while idle"""
+    updates, unsubscribe = subscribe_progress([video_id])
+    try:
+        progress_data = progress_store.latest_for_video(video_id)
+        if progress_data is None:
+            yield _sse_event("progress", {'status': 'not_found', 'error': 'Video not being processed'}, 0)
+            return
+
+        event_id = 1
+        yield _sse_event("progress", progress_data, event_id)
+        # Stop streaming when completed or error
+        while progress_data["status"] not in FINISHED_STATUSES:
+            try:
+                progress_data = await asyncio.wait_for(updates.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            # Coalesce bursts: only the newest state matters
+            while not updates.empty():
+                progress_data = updates.get_nowait()
+            event_id += 1
+            yield _sse_event("progress", progress_data, event_id)
+    finally:
+        unsubscribe()
 
 @app.get("/api/progress/{video_id}/stream")
 async def progress_stream(video_id: str):
     """Server-Sent Events progress stream"""
     return StreamingResponse(
         progress_stream_generator(video_id),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "*",
         }
     )
 
-def summarize_conclusions(transcript: str, lang: str = "zh") -> Tuple[List[str], str]:
+@app.websocket("/ws/progress")
+async def progress_socket(websocket: WebSocket):
+    """Multiplexed progress channel: one connection, many job or video ids, deltas only
+
+    Client messages: {"action": "subscribe" | "unsubscribe", "ids": [...]}.
+    Server messages: {"type": "subscribed" | "unsubscribed", "ids": [...]},
+    {"type": "progress", "job_id", "video_id", "changes": {...}} and {"type": "error", "error"}.
+    The first progress message per job carries the full record, later ones only changed fields.
+    """
+    await websocket.accept()
+    updates: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    listener = _queue_listener(updates)
+    subscriptions: Dict[str, Callable[[], None]] = {}
+    last_sent: Dict[str, Dict[str, Any]] = {}
+
+    async def receive_commands():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            action = message.get("action") if isinstance(message, dict) else None
+            ids = message.get("ids") if isinstance(message, dict) else None
+            if action not in ("subscribe", "unsubscribe") or not isinstance(ids, list):
+                await websocket.send_json({"type": "error", "error": "Expected {action: subscribe|unsubscribe, ids: [...]}"})
+                continue
+            ids = [str(key) for key in ids]
+
+            if action == "unsubscribe":
+                for key in ids:
+                    unsubscribe = subscriptions.pop(key, None)
+                    if unsubscribe:
+                        unsubscribe()
+                await websocket.send_json({"type": "unsubscribed", "ids": ids})
+                continue
+
+            new_ids = [key for key in dict.fromkeys(ids) if key not in subscriptions]
+            if len(subscriptions) + len(new_ids) > WS_MAX_SUBSCRIPTIONS:
+                await websocket.send_json({"type": "error", "error": f"At most {WS_MAX_SUBSCRIPTIONS} subscriptions per connection"})
+                continue
+            for key in new_ids:
+                subscriptions[key] = progress_store.subscribe([key], listener)
+                # Current state goes through the same queue so it is ordered before later deltas.
+                # By video id only a running record is sent: a finished one belongs to an earlier run
+                # (kept for PROGRESS_TTL) and would end or fail a client that is about to start a new one
+                current = progress_store.get(key)
+                if current is None:
+                    current = progress_store.latest_for_video(key)
+                    if current is not None and current["status"] in FINISHED_STATUSES:
+                        current = None
+                if current is not None:
+                    updates.put_nowait(current)
+            await websocket.send_json({"type": "subscribed", "ids": ids})
+
+    async def send_deltas():
+        while True:
+            batch = [await updates.get()]
+            while not updates.empty():
+                batch.append(updates.get_nowait())
+            # Coalesce bursts per job: only the newest record is diffed and sent
+            latest = {record["job_id"]: record for record in batch}
+            for job_id, record in latest.items():
+                if job_id not in subscriptions and record["video_id"] not in subscriptions:
+                    continue  # unsubscribed while queued
+                previous = last_sent.get(job_id, {})
+                changes = {k: v for k, v in record.items() if previous.get(k) != v}
+                if not changes:
+                    continue
+                if record.get("status") in FINISHED_STATUSES:
+                    last_sent.pop(job_id, None)
+                else:
+                    last_sent[job_id] = record
+                await websocket.send_json({
+                    "type": "progress",
+                    "job_id": job_id,
+                    "video_id": record["video_id"],
+                    "changes": changes,
+                })
+
+    tasks = [asyncio.ensure_future(receive_commands()), asyncio.ensure_future(send_deltas())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for unsubscribe in subscriptions.values():
+            unsubscribe()
+        for task in tasks:
+            if task.done() and not task.cancelled() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"⚠️ Progress socket closed with error: {task.exception()}")
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？!?.])")
+_CJK_RE = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~1 token per CJK character, ~4 characters per token otherwise"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+def chunk_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """Split a transcript at sentence boundaries into chunks of at most ~max_tokens"""
+    pieces = []
+    for sentence in _SENTENCE_SPLIT_RE.split(transcript):
+        tokens = estimate_tokens(sentence)
+        if tokens <= max_tokens:
+            pieces.append((sentence, tokens))
+            continue
+        # Unpunctuated text (e.g. auto captions): hard-split by characters
+        step = max(1, len(sentence) * max_tokens // tokens)
+        pieces += [(sentence[i:i + step], estimate_tokens(sentence[i:i + step]))
+                   for i in range(0, len(sentence), step)]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return [c for c in chunks if c.strip()]
+
+CHUNK_PROMPT_VERSION = hashlib.sha1((SYSTEM_CHUNK_NOTES + CHUNK_TEMPLATE).encode()).hexdigest()[:12]
+
+def summarize_chunk(chunk: str, index: int, total: int) -> str:
+    """Map step: condense one transcript chunk into notes (cached independent of target language)"""
+    chunk_hash = hashlib.sha1(chunk.encode()).hexdigest()
+    cache_key = get_cache_key(f"chunk:{SUMMARY_MODEL}:{CHUNK_PROMPT_VERSION}:{chunk_hash}")
+    cached = read_cache_entry(cache_key)
+    if cached is not None:
+        return cached['notes']
+
+    messages = [
+        {"role": "system", "content": SYSTEM_CHUNK_NOTES},
+        {"role": "user", "content": CHUNK_TEMPLATE.format(index=index, total=total, chunk=chunk)}
+    ]
+    resp = openai_request(SUMMARY_MODEL, _chat_units(messages), lambda c: c.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=messages,
+        temperature=0.2,
+    ))
+    notes = resp.choices[0].message.content.strip()
+    write_cache_entry(cache_key, {'notes': notes})
+    return notes
+
+def condense_transcript(transcript: str, max_rounds: int = 6) -> str:
+    """Hierarchically summarize chunks until the text fits in a single summary call (SUMMARY_MAP_THRESHOLD)"""
+    text = transcript
+    for round_no in range(max_rounds):
+        if len(text) <= SUMMARY_MAP_THRESHOLD:
+            return text
+        chunks = chunk_transcript(text, SUMMARY_CHUNK_TOKENS)
+        print(f"🧩 Map round {round_no + 1}: {len(chunks)} chunks from {len(text)} chars")
+        with ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_CONCURRENCY, len(chunks))),
+                                thread_name_prefix="summary-map") as pool:
+            notes = list(pool.map(bind_priority(summarize_chunk), chunks, range(1, len(chunks) + 1), [len(chunks)] * len(chunks)))
+        condensed = "\n\n".join(f"[第 {i}/{len(notes)} 部分]\n{n}" for i, n in enumerate(notes, 1))
+        if len(condensed) >= len(text):
+            print(f"⚠️ Map round {round_no + 1} did not shrink the text ({len(condensed)} chars), stopping")
+            break
+        text = condensed
+
+    if len(text) > SUMMARY_MAP_THRESHOLD:
+        print(f"⚠️ Condensed transcript is still {len(text)} chars, truncating to {SUMMARY_MAP_THRESHOLD}")
+        text = text[:SUMMARY_MAP_THRESHOLD]
+    return text
+
+def _summary_messages(transcript: str, lang: str) -> List[Dict[str, str]]:
+    if len(transcript) > SUMMARY_MAP_THRESHOLD:
+        transcript = condense_transcript(transcript)
+
     sys_prompt = SYSTEM_SUMMARY
-    user_prompt = USER_TEMPLATE.format(lang=lang, transcript=transcript[:18000])  # 防止超长
+    user_prompt = USER_TEMPLATE.format(lang=lang, transcript=transcript)
+    return [
+        {"role": "system", "content": sys_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
 
-    resp = client.chat.completions.create(
+def _parse_summary_line(line: str) -> Optional[Tuple[bool, str]]:
+    """Classify one output line as (is_overall, text); None for blank lines"""
+    if not line.strip():
+        return None
+    l = line.strip().strip("- •\t ")
+    # 把可能的"整体观点"单独留在 summary 中
+    return l.startswith("整体观点") or l.lower().startswith("overall"), l
+
+def summarize_conclusions(transcript: str, lang: str = "zh") -> Tuple[List[str], str]:
+    # Built outside the lambda: condensing makes its own blocking client calls
+    messages = _summary_messages(transcript, lang)
+    resp = openai_request(SUMMARY_MODEL, _chat_units(messages), lambda c: c.chat.completions.create(
         model=SUMMARY_MODEL,
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
+        messages=messages,
         temperature=0.2,
-    )
+    ))
     text = resp.choices[0].message.content.strip()
 
     # 简单解析：按行分割，提取前 3–6 条
-    lines = [l.strip("- •\t ") for l in text.splitlines() if l.strip()]
-    # 把可能的"整体观点"单独留在 summary 中
     conclusions = []
     overall = []
-    for l in lines:
-        if l.startswith("整体观点") or l.lower().startswith("overall"):
-            overall.append(l)
-        else:
-            conclusions.append(l)
+    for line in text.splitlines():
+        parsed = _parse_summary_line(line)
+        if parsed is None:
+            continue
+        is_overall, l = parsed
+        (overall if is_overall else conclusions).append(l)
     return conclusions[:6], "\n".join(overall)
 
+def stream_summary_conclusions(transcript: str, lang: str = "zh") -> Iterator[Tuple[str, Any]]:
+    """Streaming variant of summarize_conclusions
 
-@app.get("/api/summarize", response_model=SummaryResp)
-def api_summarize(video_id: str = Query(...), lang: str = Query("zh")):
-    if not OPENAI_API_KEY:
-        raise RuntimeError("OPENAI_API_KEY 未配置")
+    Yields ("token", text) for every model delta, ("conclusion", text) and
+    ("overall", text) as soon as each line is complete, and finally
+    ("done", (conclusions, overall)) with the same result summarize_conclusions returns.
+    """
+    messages = _summary_messages(transcript, lang)
+    stream = rate_limiter.stream(SUMMARY_MODEL, _chat_units(messages), lambda: openai_client.stream(
+        lambda c: c.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=messages,
+            temperature=0.2,
+            stream=True,
+        )
+    ))
+    conclusions: List[str] = []
+    overall: List[str] = []
+    buffer = ""
+
+    def take_line(line: str) -> Optional[Tuple[str, str]]:
+        parsed = _parse_summary_line(line)
+        if parsed is None:
+            return None
+        is_overall, l = parsed
+        if is_overall:
+            overall.append(l)
+            return "overall", l
+        conclusions.append(l)
+        return ("conclusion", l) if len(conclusions) <= 6 else None
+
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            yield "token", delta
+            buffer += delta
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                event = take_line(line)
+                if event:
+                    yield event
+        event = take_line(buffer)
+        if event:
+            yield event
+    finally:
+        stream.close()
+    yield "done", (conclusions[:6], "\n".join(overall))
+
+
+# In-flight work keyed by stage: ("summary", video_id, lang) and ("transcript", video_id);
+# later callers wait on the first run instead of repeating it
+_inflight_lock = threading.Lock()
+_inflight: Dict[Tuple[str, ...], Future] = {}
+
+def _single_flight(key: Tuple[str, ...], fn: Callable[[], Any], on_join: Optional[Callable[[], None]] = None) -> Any:
+    """Run fn once per key at a time; concurrent callers with the same key share its result"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not is_leader:
+        if on_join:
+            on_join()
+        return future.result()
+
+    try:
+        result = fn()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def summarize_video(video_id: str, lang: str = "zh", job_id: Optional[str] = None) -> SummaryResp:
+    """Run the summary pipeline once per (video_id, lang), sharing the result with concurrent callers"""
+    return _single_flight(
+        ("summary", video_id, lang),
+        lambda: _run_summary_pipeline(video_id, lang, job_id),
+        on_join=lambda: print(f"⏳ Joining in-flight run for video {video_id} ({lang})"),
+    )
 
+def _summary_progress(video_id: str, job_id: Optional[str] = None) -> ProgressTracker:
+    """Progress tracker with the steps of the summary pipeline"""
+    progress = ProgressTracker(video_id, job_id)
+    for step in ("检查缓存", "下载音频", "音频转录", "AI总结", "完成"):
+        progress.add_step(step)
+    return progress
+
+def _shared_transcript(video_id: str, lang: str, progress: ProgressTracker) -> Tuple[str, bool]:
+    """_acquire_transcript run once per video at a time, shared by summaries, streams and jobs"""
+    joined = []
+
+    def join():
+        joined.append(True)
+        print(f"⏳ Joining in-flight transcription for video {video_id}")
+        progress.next_step("等待转录")
+
+    result = _single_flight(("transcript", video_id), lambda: _acquire_transcript(video_id, lang, progress), join)
+    if joined:
+        progress.next_step("转录完成")
+    return result
+
+def _acquire_transcript(video_id: str, lang: str, progress: ProgressTracker) -> Tuple[str, bool]:
+    """Transcript from cache, captions or audio (demo text as last resort); returns (transcript, is_demo)"""
+    is_demo = False
+    cached_transcript = get_cached_transcript(video_id)
+    caption_transcript = None if cached_transcript else get_caption_transcript(video_id, lang)
+    if cached_transcript:
+        transcript = cached_transcript
+        progress.next_step("使用缓存")
+        progress.next_step("跳过下载")
+    elif caption_transcript:
+        transcript = caption_transcript
+        save_cached_transcript(video_id, transcript)
+        progress.next_step("使用字幕")
+        progress.next_step("跳过下载")
+    else:
+        work = Path(tempfile.mkdtemp(dir=TMP_DIR))
+        try:
+            # Try YouTube download first
+            progress.next_step("下载音频")
+            try:
+                transcript = None
+                if STREAMING_PIPELINE:
+                    try:
+                        transcript = transcribe_streaming(video_id, work, progress)
+                    except (RuntimeError, subprocess.CalledProcessError) as e:
+                        print(f"⚠️ Streaming pipeline failed, falling back to full download: {e}")
+                if transcript is None:
+                    segments = acquire_segments(video_id, work)
+                    progress.next_step("音频转录")
+                    transcript = transcribe_segments(segments, video_id=video_id)
+                # Cache the successful transcript
+                save_cached_transcript(video_id, transcript)
+                print(f"✅ Successfully downloaded and transcribed video {video_id}")
+            except RuntimeError as e:
+                # Fallback to demo mode
+                progress.next_step("演示模式")
+                print(f"📹 Falling back to demo mode for video {video_id}: {e}")
+                transcript = get_demo_transcript(video_id)
+                is_demo = True
+        finally:
+            # Clean up temp directory
+            try:
+                shutil.rmtree(work, ignore_errors=True)
+            except:
+                pass
+    return transcript, is_demo
+
+def _build_summary(video_id: str, lang: str, transcript: str, conclusions: List[str],
+                   overall: str, is_demo: bool) -> SummaryResp:
+    preview = transcript[:1200] + ("…" if len(transcript) > 1200 else "")
+    result = SummaryResp(
+        video_id=video_id,
+        conclusions=conclusions or ["未提取到明确结论，请查看详细总结或重试。"],
+        summary=overall,
+        transcript_preview=preview,
+    )
+    if not is_demo and conclusions:
+        save_cached_summary(result, lang)
+    return result
+
+def _run_summary_pipeline(video_id: str, lang: str, job_id: Optional[str] = None) -> SummaryResp:
     # Initialize progress tracking
-    progress = ProgressTracker(video_id)
-    progress.add_step("检查缓存")
-    progress.add_step("下载音频") 
-    progress.add_step("音频转录")
-    progress.add_step("AI总结")
-    progress.add_step("完成")
+    progress = _summary_progress(video_id, job_id)
 
     try:
         # Check cache first
         progress.next_step("检查缓存")
-        cached_transcript = get_cached_transcript(video_id)
-        if cached_transcript:
-            transcript = cached_transcript
-            progress.next_step("使用缓存")
-            progress.next_step("跳过下载")
-        else:
-            work = Path(tempfile.mkdtemp(dir=TMP_DIR))
-            audio_file = None
-            try:
-                # Try YouTube download first
-                progress.next_step("下载音频")
-                try:
-                    audio_file = download_audio_by_video_id(video_id, work)
-                    progress.next_step("音频转录")
-                    transcript = transcribe_whisper(audio_file)
-                    # Cache the successful transcript
-                    save_cached_transcript(video_id, transcript)
-                    print(f"✅ Successfully downloaded and transcribed video {video_id}")
-                except RuntimeError as e:
-                    # Fallback to demo mode
-                    progress.next_step("演示模式")
-                    print(f"📹 Falling back to demo mode for video {video_id}: {e}")
-                    transcript = get_demo_transcript(video_id)
-            finally:
-                # Clean up temp directory
-                try:
-                    shutil.rmtree(work, ignore_errors=True)
-                except:
-                    pass
-        
+        cached_summary = get_cached_summary(video_id, lang)
+        if cached_summary is not None:
+            progress.complete()
+            return cached_summary
+
+        transcript, is_demo = _shared_transcript(video_id, lang, progress)
+
         # Generate conclusions and summary
         progress.next_step("AI总结")
         conclusions, overall = summarize_conclusions(transcript, lang=lang)
-        preview = transcript[:1200] + ("…" if len(transcript) > 1200 else "")
+        result = _build_summary(video_id, lang, transcript, conclusions, overall, is_demo)
         
         progress.complete()
-        
-        return SummaryResp(
-            video_id=video_id,
-            conclusions=conclusions or ["未提取到明确结论，请查看详细总结或重试。"],
-            summary=overall,
-            transcript_preview=preview,
-        )
+        return result
     
     except Exception as e:
         progress.error(f"处理失败: {str(e)}")
         raise
 
 
+@app.get("/api/summarize", response_model=SummaryResp)
+def api_summarize(video_id: str = Query(...), lang: str = Query("zh")):
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY 未配置")
+
+    return summarize_video(video_id, lang)
+
+def summary_event_stream(video_id: str, lang: str) -> Iterator[str]:
+    """SSE events: transcript_ready, then token / conclusion / overall as the model writes, then summary"""
+    event_ids = itertools.count(1)
+    started = time.time()
+    progress = _summary_progress(video_id)
+    finished = False
+
+    try:
+        progress.next_step("检查缓存")
+        cached_summary = get_cached_summary(video_id, lang)
+        if cached_summary is not None:
+            progress.complete()
+            finished = True
+            yield _sse_event("transcript_ready", {"video_id": video_id, "cached": True}, next(event_ids))
+            for text in cached_summary.conclusions:
+                yield _sse_event("conclusion", {"text": text}, next(event_ids))
+            yield _sse_event("summary", jsonable_encoder(cached_summary), next(event_ids))
+            return
+
+        transcript, is_demo = _shared_transcript(video_id, lang, progress)
+        yield _sse_event("transcript_ready", {"video_id": video_id, "cached": False, "demo": is_demo,
+                                              "characters": len(transcript)}, next(event_ids))
+
+        progress.next_step("AI总结")
+        first_conclusion_at = None
+        for kind, payload in stream_summary_conclusions(transcript, lang=lang):
+            if kind == "done":
+                conclusions, overall = payload
+                break
+            if kind == "conclusion" and first_conclusion_at is None:
+                first_conclusion_at = time.time()
+                print(f"⏱️ First conclusion for video {video_id} after {first_conclusion_at - started:.1f}s")
+            yield _sse_event(kind, {"text": payload}, next(event_ids))
+
+        result = _build_summary(video_id, lang, transcript, conclusions, overall, is_demo)
+        progress.complete()
+        finished = True
+        yield _sse_event("summary", jsonable_encoder(result), next(event_ids))
+    except Exception as e:
+        progress.error(f"处理失败: {str(e)}")
+        finished = True
+        yield _sse_event("error", {"error": str(e)}, next(event_ids))
+    finally:
+        # A client disconnect closes the generator with GeneratorExit, which skips the except above;
+        # finish the record anyway so its TTL runs and subscribers stop waiting on it
+        if not finished:
+            progress.error("客户端已断开连接，处理已取消")
+
+@app.get("/api/summarize/stream")
+def api_summarize_stream(video_id: str = Query(...), lang: str = Query("zh")):
+    """Server-Sent Events variant of /api/summarize that streams the model output"""
+    if not OPENAI_API_KEY:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY 未配置")
+
+    return StreamingResponse(
+        summary_event_stream(video_id, lang),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+# Asynchronous jobs: persisted in SQLite, run by a bounded worker pool outside the request threads
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="summary-job")
+job_queue: Optional[SQLiteJobQueue] = None
+
+def _run_job(job_id: str) -> None:
+    job = job_queue.start(job_id)
+    if job is None:
+        return  # already claimed or finished
+    try:
+        # Cached stage outputs (transcript, segment checkpoints, summary) make a resumed job cheap
+        with request_priority(job["priority"]):
+            result = summarize_video(job["video_id"], job["lang"], job_id=job_id)
+        job_queue.complete(job_id, jsonable_encoder(result))
+    except Exception as e:
+        job_queue.fail(job_id, str(e))
+        print(f"❌ Job {job_id} failed: {e}")
+
+@app.on_event("startup")
+def resume_jobs():
+    """Requeue jobs and batch items that were queued or running when the server last stopped"""
+    pruned = job_queue.prune(JOB_RETENTION)
+    job_ids = job_queue.recover()
+    for job_id in job_ids:
+        job = job_queue.get(job_id)
+        if job["batch_id"] is None:
+            job_executor.submit(_run_job, job_id)
+        else:
+            batch = _get_batch(job["batch_id"])
+            batch_executor.submit(_run_batch_item, batch, job["video_id"])
+    if job_ids or pruned:
+        print(f"🔁 Resumed {len(job_ids)} job(s), pruned {pruned} finished job(s)")
+
+@app.post("/api/jobs", status_code=202)
+def create_job(req: JobRequest):
+    """Queue a summary job and return its id immediately"""
+    if not OPENAI_API_KEY:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY 未配置")
+
+    job_id = uuid.uuid4().hex
+    if not job_queue.enqueue(job_id, req.video_id, req.lang, max_active=JOB_WORKERS + JOB_QUEUE_MAX):
+        raise HTTPException(status_code=429, detail="任务队列已满，请稍后重试")
+    job_executor.submit(_run_job, job_id)
+    print(f"🧾 Queued job {job_id} for video {req.video_id}")
+    return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get job status, live progress and (once completed) the summary"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # A job that joined another in-flight run has no record of its own; show the shared one
+    progress = progress_store.get(job_id) or progress_store.latest_for_video(job["video_id"])
+    return {**job, "progress": progress}
+
+
+# Batches: many videos scheduled on their own bounded pool, results streamed as they finish
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="summary-batch")
+batches_store: Dict[str, "BatchRun"] = {}
+
+class BatchRun:
+    """Per-video state of one batch plus the finished items, in completion order"""
+
+    def __init__(self, batch_id: str, lang: str, video_ids: List[str]):
+        self.batch_id = batch_id
+        self.lang = lang
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.items: Dict[str, Dict[str, Any]] = {
+            video_id: {
+                "video_id": video_id,
+                "job_id": f"{batch_id}-{index}",
+                "status": "queued",
+                "cached": False,
+                "result": None,
+                "error": None,
+            }
+            for index, video_id in enumerate(video_ids)
+        }
+        self.finished: List[Dict[str, Any]] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def start(self, video_id: str) -> None:
+        with self._lock:
+            self.items[video_id]["status"] = "running"
+
+    def finish(self, video_id: str, **fields: Any) -> None:
+        with self._lock:
+            item = self.items[video_id]
+            item.update(fields)
+            event = dict(item)
+            self.finished.append(event)
+            if len(self.finished) == len(self.items):
+                self.finished_at = time.time()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event)
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> Tuple[List[Dict[str, Any]], Callable[[], None]]:
+        """Register a listener for items finishing from now on; returns the ones already finished"""
+        with self._lock:
+            self._listeners.append(listener)
+            already = list(self.finished)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._listeners.remove(listener)
+
+        return already, unsubscribe
+
+    @classmethod
+    def restore(cls, batch_id: str, jobs: List[Dict[str, Any]]) -> "BatchRun":
+        """Rebuild a batch from its persisted items, e.g. after a restart"""
+        batch = cls(batch_id, jobs[0]["lang"], [job["video_id"] for job in jobs])
+        batch.created_at = jobs[0]["created_at"]
+        finished = [job for job in jobs if job["status"] in FINISHED_STATUSES]
+        for job in sorted(finished, key=lambda job: job["finished_at"]):
+            batch.finish(job["video_id"], status=job["status"], cached=job["cached"],
+                         result=job["result"], error=job["error"])
+        if batch.finished_at:
+            batch.finished_at = max(job["finished_at"] for job in finished)
+        return batch
+
+    def status(self) -> Dict[str, Any]:
+        """Aggregate counts and progress; running videos count by their own tracker progress"""
+        with self._lock:
+            items = [dict(item) for item in self.items.values()]
+        counts = {status: 0 for status in ("queued", "running", "completed", "error")}
+        done_units = 0.0
+        for item in items:
+            counts[item["status"]] += 1
+            if item["status"] in FINISHED_STATUSES:
+                done_units += 1
+            elif item["status"] == "running":
+                progress = progress_store.get(item["job_id"]) or progress_store.latest_for_video(item["video_id"])
+                done_units += (progress or {}).get("progress", 0) / 100
+        return {
+            "batch_id": self.batch_id,
+            "lang": self.lang,
+            "status": "completed" if self.finished_at else "running",
+            "total": len(items),
+            "counts": counts,
+            "cached": sum(1 for item in items if item["cached"]),
+            "progress": int(done_units * 100 / len(items)) if items else 100,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "items": items,
+        }
+
+def _run_batch_item(batch: BatchRun, video_id: str) -> None:
+    job_id = batch.items[video_id]["job_id"]
+    job = job_queue.start(job_id)
+    if job is None:
+        return  # already claimed or finished
+    batch.start(video_id)
+    try:
+        # Batch items are stored at BATCH priority and queue behind interactive requests for API budget
+        with request_priority(job["priority"]):
+            result = jsonable_encoder(summarize_video(video_id, batch.lang, job_id=job_id))
+        job_queue.complete(job_id, result)
+        batch.finish(video_id, status="completed", result=result)
+    except Exception as e:
+        print(f"❌ Batch {batch.batch_id} video {video_id} failed: {e}")
+        job_queue.fail(job_id, str(e))
+        batch.finish(video_id, status="error", error=str(e))
+
+def _prune_batches() -> None:
+    now = time.time()
+    for batch_id, batch in list(batches_store.items()):
+        if batch.finished_at and now - batch.finished_at > PROGRESS_TTL:
+            batches_store.pop(batch_id, None)
+
+@app.post("/api/batch", status_code=202)
+def create_batch(req: BatchRequest):
+    """Summarize a list of videos or a playlist; cached summaries are returned without scheduling"""
+    if not OPENAI_API_KEY:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY 未配置")
+
+    video_ids = list(req.video_ids)
+    if req.playlist_url:
+        try:
+            video_ids.extend(expand_playlist(req.playlist_url))
+        except RuntimeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    video_ids = list(dict.fromkeys(v.strip() for v in video_ids if v and v.strip()))
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="请提供 video_ids 或 playlist_url")
+    if len(video_ids) > BATCH_MAX_VIDEOS:
+        raise HTTPException(status_code=400, detail=f"单个批次最多 {BATCH_MAX_VIDEOS} 个视频")
+
+    _prune_batches()
+    batch_id = uuid.uuid4().hex
+    batch = BatchRun(batch_id, req.lang, video_ids)
+    cached: Dict[str, Dict[str, Any]] = {}
+    for video_id in video_ids:
+        cached_summary = get_cached_summary(video_id, req.lang)
+        if cached_summary is not None:
+            cached[video_id] = jsonable_encoder(cached_summary)
+
+    # Persist every item before accepting so a restart resumes the batch instead of losing it
+    items = [(item["job_id"], video_id) for video_id, item in batch.items.items()]
+    job_queue.enqueue_batch(batch_id, req.lang, items, priority=BATCH, cached=cached)
+    batches_store[batch_id] = batch
+
+    for video_id in video_ids:
+        if video_id in cached:
+            batch.finish(video_id, status="completed", cached=True, result=cached[video_id])
+        else:
+            batch_executor.submit(_run_batch_item, batch, video_id)
+    scheduled = len(video_ids) - len(cached)
+
+    print(f"📦 Batch {batch_id}: {len(video_ids)} videos, {len(video_ids) - scheduled} from cache, {scheduled} scheduled")
+    return {
+        "batch_id": batch_id,
+        "total": len(video_ids),
+        "cached": len(video_ids) - scheduled,
+        "scheduled": scheduled,
+        "status_url": f"/api/batch/{batch_id}",
+        "stream_url": f"/api/batch/{batch_id}/stream",
+    }
+
+def _get_batch(batch_id: str) -> BatchRun:
+    """In-memory batch, rebuilt from the job queue if it was pruned or the server restarted"""
+    batch = batches_store.get(batch_id)
+    if batch is None:
+        jobs = job_queue.batch_jobs(batch_id)
+        if not jobs:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        batch = batches_store.setdefault(batch_id, BatchRun.restore(batch_id, jobs))
+    return batch
+
+@app.get("/api/batch/{batch_id}")
+def get_batch(batch_id: str):
+    """Aggregate progress of a batch with per-video status and results"""
+    return _get_batch(batch_id).status()
+
+async def batch_stream_generator(batch: BatchRun):
+    """SSE: one result event per finished video (already finished ones first), then done"""
+    updates: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    already, unsubscribe = batch.subscribe(_queue_listener(updates))
+    try:
+        event_ids = itertools.count(1)
+        sent = 0
+        for item in already:
+            sent += 1
+            yield _sse_event("result", item, next(event_ids))
+        while sent < len(batch.items):
+            try:
+                item = await asyncio.wait_for(updates.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            sent += 1
+            yield _sse_event("result", item, next(event_ids))
+        status = batch.status()
+        status.pop("items")
+        yield _sse_event("done", status, next(event_ids))
+    finally:
+        unsubscribe()
+
+@app.get("/api/batch/{batch_id}/stream")
+async def batch_stream(batch_id: str):
+    """Server-Sent Events stream of per-video batch results as they finish"""
+    return StreamingResponse(
+        batch_stream_generator(_get_batch(batch_id)),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 启动 YouTube 视频总结服务...")
@@ -0,0 +1,460 @@
+"""
+音频处理工具 - yt-dlp 音频下载、ffprobe 时长探测、静音裁剪与单次遍历分段
+"""
+
+import csv
+import os
+import re
+import subprocess
+from bisect import bisect_left, bisect_right
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from yt_dlp import YoutubeDL
+
+# Whisper API rejects uploads above 25 MB; keep some headroom for container overhead
+WHISPER_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+UPLOAD_HEADROOM = 0.9
+MIN_SEGMENT_SECONDS = 60
+
+
+class AudioSegment(NamedTuple):
+    path: Path
+    start: float  # offset in seconds within the original audio
+    end: float
+
+
+class AudioProfile(NamedTuple):
+    name: str
+    codec: Optional[str]         # FFmpegExtractAudio codec; None keeps the native m4a/webm stream
+    quality: Optional[str]       # FFmpegExtractAudio preferredquality (kbps)
+    extract_args: List[str]      # extra ffmpeg args for the yt-dlp post-processor
+    ffmpeg_args: List[str]       # encoder args when ffmpeg produces the audio itself
+    ext: Optional[str]           # extension of encoded segments; None keeps the source extension
+
+
+AUDIO_PROFILES: Dict[str, AudioProfile] = {
+    # Previous default: 128 kbps stereo MP3
+    "mp3": AudioProfile("mp3", "mp3", "128", [], ['-c:a', 'libmp3lame', '-b:a', '128k'], "mp3"),
+    # Mono 16 kHz Opus at 24 kbps; Whisper resamples to 16 kHz mono anyway
+    "speech": AudioProfile(
+        "speech", "opus", "24", ['-ac', '1', '-ar', '16000'],
+        ['-ac', '1', '-ar', '16000', '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip'], "ogg"
+    ),
+    # Upload YouTube's m4a/webm audio as-is, no re-encode
+    "native": AudioProfile("native", None, None, [], ['-c:a', 'copy'], None),
+}
+
+
+def get_audio_profile(name: str) -> AudioProfile:
+    """Look up an audio profile by name"""
+    try:
+        return AUDIO_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown audio profile '{name}' (available: {', '.join(AUDIO_PROFILES)})")
+
+
+def ytdlp_audio_options(profile: AudioProfile) -> Dict[str, Any]:
+    """yt-dlp options that make a download produce audio in the given profile"""
+    if profile.codec is None:
+        return {"postprocessors": []}
+
+    opts: Dict[str, Any] = {
+        "postprocessors": [{
+            "key": "FFmpegExtractAudio",
+            "preferredcodec": profile.codec,
+            "preferredquality": profile.quality,
+        }]
+    }
+    if profile.extract_args:
+        opts["postprocessor_args"] = {"extractaudio": list(profile.extract_args)}
+    return opts
+
+
+def find_audio_file(out_dir: Path, video_id: str) -> Path:
+    """Helper to find downloaded audio file"""
+    audio_path = out_dir / f"{video_id}.mp3"
+    if audio_path.exists():
+        return audio_path
+    
+    # 兜底查找
+    for f in out_dir.glob(f"{video_id}.*"):
+        if f.suffix.lower() == '.opus':
+            # Ogg Opus; Whisper only accepts it under the .ogg extension
+            return f.rename(f.with_suffix('.ogg'))
+        if f.suffix.lower() in {'.m4a', '.mp3', '.webm', '.ogg'}:
+            return f
+    raise FileNotFoundError("音频文件未找到")
+
+
+def download_audio(video_id: str, out_dir: Path, profile: AudioProfile,
+                   cookies_path: Optional[str] = None) -> Path:
+    """Enhanced YouTube download with anti-bot bypass strategies"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    
+    # TODO(human): Implement robust download strategy with cookies support and fallback mechanisms
+    # Requirements:
+    # 1. Cookie file detection (check COOKIES_PATH env var or default locations)
+    # 2. Realistic User-Agent and browser headers for anti-bot bypass
+    # 3. Multi-tier fallback strategy: basic → cookies → enhanced → demo mode
+    # 4. Smart error handling that identifies anti-bot vs network issues
+    # 5. Return appropriate exceptions for different failure types
+    
+    # Base configuration with flexible audio formats
+    base_opts = {
+        "format": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[height<=480]",
+        "outtmpl": str(out_dir / f"%(id)s.%(ext)s"),
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+        "cachedir": False,
+        "extract_flat": False,
+        "writethumbnail": False,
+        "writeinfojson": False,
+        **ytdlp_audio_options(profile),
+    }
+    
+    # Strategy 1: Basic attempt
+    try:
+        with YoutubeDL(base_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            return find_audio_file(out_dir, info['id'])
+    except Exception as e:
+        print(f"Basic download failed: {e}")
+    
+    # Strategy 2: Enhanced with cookies and realistic headers
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    
+    enhanced_opts = base_opts.copy()
+    enhanced_opts.update({
+        "http_headers": {
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive",
+        }
+    })
+    
+    # Try with cookies if available
+    if cookies_path and os.path.exists(cookies_path):
+        enhanced_opts["cookiefile"] = cookies_path
+        print(f"Using cookies from {cookies_path}")
+        try:
+            with YoutubeDL(enhanced_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+                return find_audio_file(out_dir, info['id'])
+        except Exception as e:
+            print(f"Enhanced download with cookies failed: {e}")
+    else:
+        print(f"No cookies file found at {cookies_path}")
+    
+    # Strategy 3: Try enhanced headers without cookies
+    try:
+        with YoutubeDL(enhanced_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            return find_audio_file(out_dir, info['id'])
+    except Exception as e:
+        print(f"Enhanced headers download failed: {e}")
+    
+    # Strategy 4: Fallback to demo mode
+    raise RuntimeError(f"YouTube download failed for video {video_id} - all strategies exhausted")
+
+
+def resolve_stream_url(video_id: str, cookies_path: Optional[str] = None) -> Tuple[str, Dict[str, str], str]:
+    """Resolve the direct audio URL and request headers without downloading"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    opts = {
+        "format": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio",
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+        "cachedir": False,
+    }
+    if cookies_path and os.path.exists(cookies_path):
+        opts["cookiefile"] = cookies_path
+
+    try:
+        with YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise RuntimeError(f"Could not resolve audio stream for video {video_id}: {e}")
+
+    if not info.get("url"):
+        raise RuntimeError(f"No direct audio stream available for video {video_id}")
+    return info["url"], info.get("http_headers") or {}, info.get("ext") or "m4a"
+
+
+def segment_duration_for(file_path: Path, duration: float, max_seconds: int) -> int:
+    """Longest segment length (seconds) whose upload stays under the Whisper size limit
+
+    Derived from the file's actual average bitrate, so low-bitrate speech audio
+    is cut into fewer, longer segments than 128 kbps MP3.
+    """
+    if duration <= 0:
+        return max_seconds
+    bytes_per_second = file_path.stat().st_size / duration
+    seconds = int(WHISPER_MAX_UPLOAD_BYTES * UPLOAD_HEADROOM / max(bytes_per_second, 1))
+    return max(MIN_SEGMENT_SECONDS, min(max_seconds, seconds))
+
+
+def get_audio_duration(file_path: Path) -> float:
+    """Get audio duration in seconds using ffprobe"""
+    try:
+        result = subprocess.run([
+            'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
+            '-of', 'csv=p=0', str(file_path)
+        ], capture_output=True, text=True, check=True)
+        return float(result.stdout.strip())
+    except (subprocess.CalledProcessError, ValueError):
+        return 0.0
+
+
+def split_audio_file(file_path: Path, segment_duration: int = 600,
+                     cut_points: Optional[List[float]] = None) -> List[AudioSegment]:
+    """Split audio into segments in a single ffmpeg pass (default: 10 minutes)
+
+    The segment muxer cuts the stream while copying it once, and writes a CSV
+    list with the exact start/end offset of every segment it produced. Pass
+    ``cut_points`` to cut at explicit offsets instead of fixed intervals.
+    """
+    duration = get_audio_duration(file_path)
+    if cut_points is None:
+        if duration <= segment_duration:
+            return [AudioSegment(file_path, 0.0, duration)]  # No need to split
+        split_args = ['-segment_time', str(segment_duration)]
+    elif not cut_points:
+        return [AudioSegment(file_path, 0.0, duration)]
+    else:
+        split_args = ['-segment_times', ",".join(f"{t:.3f}" for t in cut_points)]
+
+    list_file = file_path.with_name(f"{file_path.stem}_segments.csv")
+    pattern = file_path.with_name(f"{file_path.stem}_segment_%03d{file_path.suffix}")
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-i', str(file_path),
+        '-map', '0:a', '-c', 'copy',
+        '-f', 'segment', *split_args,
+        '-reset_timestamps', '1',
+        '-segment_list', str(list_file), '-segment_list_type', 'csv',
+        str(pattern), '-y'
+    ]
+
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to split {file_path.name}: {e.stderr.decode(errors='ignore').strip()}")
+        raise
+
+    segments = read_segment_list(list_file)
+    print(f"Created {len(segments)} segments for {file_path.name} in one pass")
+    return segments
+
+
+def read_segment_list(list_file: Path) -> List[AudioSegment]:
+    """Parse a CSV segment list written by ffmpeg's segment muxer"""
+    with open(list_file, newline='', encoding='utf-8') as f:
+        return _parse_segment_rows(f, list_file.parent)
+
+
+def _parse_segment_rows(lines, base_dir: Path) -> List[AudioSegment]:
+    segments = []
+    for row in csv.reader(lines):
+        if len(row) < 3:
+            continue
+        segments.append(AudioSegment(base_dir / row[0], float(row[1]), float(row[2])))
+    return segments
+
+
+class SpeechTimeline:
+    """Speech spans kept after silence trimming, mapping trimmed offsets back to the original audio"""
+
+    def __init__(self, spans: List[Tuple[float, float]], duration: float):
+        self.spans = spans
+        self.duration = duration
+        self._original_starts = [start for start, _ in spans]
+        self._trimmed_starts = []
+        offset = 0.0
+        for start, end in spans:
+            self._trimmed_starts.append(offset)
+            offset += end - start
+        self.kept_seconds = offset
+
+    @classmethod
+    def from_silences(cls, duration: float, silences: List[Tuple[float, float]],
+                      min_gap: float, padding: float) -> "SpeechTimeline":
+        """Drop every silence longer than ``min_gap``, keeping ``padding`` seconds on both sides"""
+        spans = []
+        cursor = 0.0
+        for start, end in silences:
+            if end - start < min_gap:
+                continue
+            cut_start, cut_end = start + padding, end - padding
+            if cut_start > cursor:
+                spans.append((cursor, cut_start))
+            cursor = max(cursor, cut_end)
+        if cursor < duration:
+            spans.append((cursor, duration))
+        return cls(spans, duration)
+
+    @property
+    def dropped_seconds(self) -> float:
+        return max(0.0, self.duration - self.kept_seconds)
+
+    def to_original(self, t: float, at_end: bool = False) -> float:
+        """Map an offset in the trimmed audio to the original timeline
+
+        A join between two spans maps to the start of the later span, or to the
+        end of the earlier one when ``at_end`` is set (for segment end offsets).
+        """
+        if not self.spans:
+            return t
+        find = bisect_left if at_end else bisect_right
+        i = max(0, find(self._trimmed_starts, t) - 1)
+        start, end = self.spans[i]
+        return min(end, start + (t - self._trimmed_starts[i]))
+
+    def to_trimmed(self, t: float) -> float:
+        """Map an original offset to the trimmed audio; dropped gaps collapse to the join"""
+        i = bisect_right(self._original_starts, t) - 1
+        if i < 0:
+            return 0.0
+        start, end = self.spans[i]
+        return self._trimmed_starts[i] + min(t, end) - start
+
+    def segment_to_original(self, segment: AudioSegment) -> AudioSegment:
+        return segment._replace(start=self.to_original(segment.start),
+                                end=self.to_original(segment.end, at_end=True))
+
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+
+def detect_silences(file_path: Path, noise_db: float = -35.0, min_silence: float = 0.4) -> List[Tuple[float, float]]:
+    """Find silent spans with ffmpeg's silencedetect filter (one decode pass)"""
+    result = subprocess.run([
+        'ffmpeg', '-hide_banner', '-nostats', '-i', str(file_path),
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_silence}',
+        '-f', 'null', '-'
+    ], capture_output=True, text=True, check=True)
+
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(result.stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    if start is not None:
+        silences.append((start, get_audio_duration(file_path)))
+    return silences
+
+
+def plan_cut_points(duration: float, candidates: List[float], max_seconds: float) -> List[float]:
+    """Choose cut offsets so no segment exceeds ``max_seconds``, preferring silent candidates
+
+    Each cut lands on the latest candidate in the second half of the window,
+    so words are not split; only when there is none is the cut forced.
+    """
+    cuts = []
+    start = 0.0
+    while duration - start > max_seconds:
+        lo = bisect_right(candidates, start + max_seconds / 2)
+        hi = bisect_right(candidates, start + max_seconds)
+        cut = candidates[hi - 1] if hi > lo else start + max_seconds
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+def trim_to_timeline(file_path: Path, timeline: SpeechTimeline, profile: AudioProfile) -> Path:
+    """Re-encode only the kept speech spans into a new file"""
+    if 'copy' in profile.ffmpeg_args:
+        profile = AUDIO_PROFILES["speech"]  # filtering needs a re-encode
+    selected = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in timeline.spans)
+    out_path = file_path.with_name(f"{file_path.stem}_speech.{profile.ext}")
+    subprocess.run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', str(file_path),
+        '-vn', '-af', f"aselect='{selected}',asetpts=N/SR/TB",
+        *profile.ffmpeg_args, str(out_path), '-y'
+    ], capture_output=True, check=True)
+    return out_path
+
+
+def split_on_silence(file_path: Path, profile: AudioProfile, max_segment_seconds: int,
+                     noise_db: float = -35.0, min_gap: float = 2.0, padding: float = 0.3,
+                     cut_silence: float = 0.4) -> Tuple[List[AudioSegment], SpeechTimeline]:
+    """Drop long non-speech spans, then cut the remaining audio inside pauses
+
+    Returned segment offsets are in the trimmed timeline; map them back to the
+    original video with ``SpeechTimeline.segment_to_original``.
+    """
+    duration = get_audio_duration(file_path)
+    silences = detect_silences(file_path, noise_db, cut_silence)
+    timeline = SpeechTimeline.from_silences(duration, silences, min_gap, padding)
+
+    source = file_path
+    if timeline.dropped_seconds > 0 and timeline.spans:
+        source = trim_to_timeline(file_path, timeline, profile)
+    else:
+        timeline = SpeechTimeline([(0.0, duration)], duration)
+
+    # Pauses map to the middle of their (possibly collapsed) span in the trimmed audio
+    candidates = sorted(
+        (timeline.to_trimmed(start) + timeline.to_trimmed(end)) / 2 for start, end in silences
+    )
+    segment_duration = segment_duration_for(source, timeline.kept_seconds, max_segment_seconds)
+    cuts = plan_cut_points(timeline.kept_seconds, candidates, segment_duration)
+    return split_audio_file(source, cut_points=cuts), timeline
+
+
+def stream_segments(source: str, out_dir: Path, segment_duration: int = 600,
+                    http_headers: Optional[Dict[str, str]] = None,
+                    profile: AudioProfile = AUDIO_PROFILES["mp3"],
+                    source_ext: str = "m4a",
+                    poll_interval: float = 0.5) -> Iterator[AudioSegment]:
+    """Segment a remote audio stream while it downloads, yielding each finished segment
+
+    ffmpeg reads the media URL directly and appends a row to the CSV segment
+    list every time it closes a segment, so callers can start working on the
+    first chunk long before the rest of the audio has arrived.
+    """
+    list_file = out_dir / "stream_segments.csv"
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+    if http_headers:
+        cmd += ['-headers', "".join(f"{k}: {v}\r\n" for k, v in http_headers.items())]
+    cmd += [
+        '-i', source,
+        '-vn', '-map', '0:a', *profile.ffmpeg_args,
+        '-f', 'segment', '-segment_time', str(segment_duration),
+        '-reset_timestamps', '1',
+        '-segment_list', str(list_file), '-segment_list_type', 'csv',
+        str(out_dir / f"stream_segment_%03d.{profile.ext or source_ext}"), '-y'
+    ]
+
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr)
+        emitted = 0
+        try:
+            while True:
+                finished = proc.poll() is not None
+                if list_file.exists():
+                    # Only rows terminated by a newline are complete
+                    rows = list_file.read_text(encoding='utf-8').split('\n')[:-1]
+                    for segment in _parse_segment_rows(rows[emitted:], out_dir):
+                        yield segment
+                    emitted = len(rows)
+                if finished:
+                    break
+                time.sleep(poll_interval)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr.read())
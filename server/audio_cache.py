@@ -0,0 +1,157 @@
+"""
+音频缓存 - 按 video_id + 音频配置缓存已下载的音频，按字节预算做 LRU 淘汰
+
+下载先写入暂存目录，完成后原子地 rename 到缓存目录，并发读取方永远看不到半截文件。
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: fall back to in-process locks only
+    fcntl = None
+
+STAGING_PREFIX = ".staging-"
+LOCK_PREFIX = ".lock-"
+LOCK_BUCKET_CHARS = 2  # 256 lock files at most, however many videos pass through
+
+
+class AudioCache:
+    """Downloaded audio files kept under a byte budget, evicted least-recently-used first"""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        for legacy_lock in self.root.glob("*.lock"):  # per-key lock files of older versions
+            legacy_lock.unlink(missing_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cache_key(video_id: str, profile: str) -> str:
+        return hashlib.sha1(f"{video_id}:{profile}".encode()).hexdigest()
+
+    def _entries(self) -> List[Path]:
+        return [p for p in self.root.iterdir() if p.is_file() and not p.name.startswith(".")]
+
+    def lookup(self, video_id: str, profile: str) -> Optional[Path]:
+        """Return the cached file, marking it as recently used"""
+        key = self.cache_key(video_id, profile)
+        for path in self.root.glob(f"{key}.*"):
+            try:
+                os.utime(path)  # mtime doubles as the LRU clock
+            except FileNotFoundError:
+                continue  # evicted meanwhile
+            return path
+        return None
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        """Serialize downloads of one key across threads and (with fcntl) processes
+
+        Keys share a lock per hash bucket so the lock files stay bounded; two
+        videos only wait on each other when their keys start with the same bucket.
+        """
+        bucket = key[:LOCK_BUCKET_CHARS]
+        with self._locks_guard:
+            lock = self._locks.setdefault(bucket, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.root / f"{LOCK_PREFIX}{bucket}", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def checkout(self, video_id: str, profile: str, dest_dir: Path,
+                 download: Callable[[Path], Path]) -> Path:
+        """Place the audio for (video_id, profile) in dest_dir, downloading it only on a miss
+
+        ``download(staging_dir)`` must return the path of the finished file.
+        The result is hard-linked into dest_dir (copied across filesystems),
+        so eviction can never pull the file out from under a running job.
+        """
+        key = self.cache_key(video_id, profile)
+        with self._key_lock(key):
+            cached = self.lookup(video_id, profile)
+            if cached is not None:
+                self.hits += 1
+                print(f"🎧 Audio cache hit for video {video_id} ({profile})")
+            else:
+                self.misses += 1
+                staging = Path(tempfile.mkdtemp(dir=self.root, prefix=STAGING_PREFIX))
+                try:
+                    downloaded = download(staging)
+                    cached = self.root / f"{key}{downloaded.suffix}"
+                    os.replace(downloaded, cached)  # atomic publish
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+                self.evict(keep=cached)
+
+            local = dest_dir / f"{video_id}{cached.suffix}"
+            if local.exists():
+                local.unlink()
+            try:
+                os.link(cached, local)
+            except OSError:
+                shutil.copyfile(cached, local)
+            return local
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least-recently-used files until the cache fits its byte budget"""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup that was served by another process sharing this directory"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries if p.exists()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
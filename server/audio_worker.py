@@ -0,0 +1,96 @@
+"""
+音频工作进程 - 在独立进程中完成音频下载、时长探测、静音裁剪与分段，API 进程只负责调度
+
+这里的函数都是模块级函数、参数和返回值都可 pickle，可直接提交给 ProcessPoolExecutor。
+"""
+
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+try:
+    from .audio import (AudioSegment, download_audio, get_audio_duration, get_audio_profile,
+                        SpeechTimeline, segment_duration_for, split_audio_file, split_on_silence)
+    from .audio_cache import AudioCache
+except ImportError:
+    from audio import (AudioSegment, download_audio, get_audio_duration, get_audio_profile,
+                       SpeechTimeline, segment_duration_for, split_audio_file, split_on_silence)
+    from audio_cache import AudioCache
+
+
+class SilenceSettings(NamedTuple):
+    noise_db: float
+    min_gap: float
+    padding: float
+
+
+class PreparedAudio(NamedTuple):
+    segments: List[AudioSegment]  # offsets on the original audio timeline
+    duration: float
+    dropped_seconds: float = 0.0
+    timeline: Optional[SpeechTimeline] = None  # set when silence was trimmed
+    cache_hit: Optional[bool] = None  # None when the audio cache is disabled
+
+
+def prepare_segments(file_path: Path, profile_name: str, max_segment_seconds: int,
+                     silence: Optional[SilenceSettings] = None, start: float = 0.0) -> PreparedAudio:
+    """Probe the audio and cut it into upload-sized segments (at silences when ``silence`` is set)
+
+    With ``start`` only the audio from that offset on is returned, cut at fixed
+    intervals; used to finish a streaming run that stopped part-way.
+    """
+    duration = get_audio_duration(file_path)
+    print(f"🎵 Audio duration: {duration:.1f}s")
+
+    if start > 0:
+        if start >= duration:
+            return PreparedAudio([], duration)
+        segment_duration = segment_duration_for(file_path, duration, max_segment_seconds)
+        cuts = [start + n * segment_duration for n in range(int((duration - start) // segment_duration) + 1)]
+        segments = split_audio_file(file_path, cut_points=[t for t in cuts if t < duration])
+        print(f"⏩ Resuming at {start:.0f}s, {len(segments) - 1} segment(s) left")
+        return PreparedAudio(segments[1:], duration)  # segments[0] is the part already transcribed
+
+    if silence is not None:
+        segments, timeline = split_on_silence(
+            file_path, get_audio_profile(profile_name), max_segment_seconds,
+            noise_db=silence.noise_db, min_gap=silence.min_gap, padding=silence.padding
+        )
+        print(f"🔇 Dropped {timeline.dropped_seconds:.1f}s of silence, {len(segments)} segment(s)")
+        segments = [timeline.segment_to_original(segment) for segment in segments]
+        return PreparedAudio(segments, duration, timeline.dropped_seconds, timeline)
+
+    # Split only when the upload would exceed the Whisper size limit (or max_segment_seconds)
+    segment_duration = segment_duration_for(file_path, duration, max_segment_seconds)
+    if duration > segment_duration:
+        print(f"🔄 Processing long video in {segment_duration}s segments...")
+        return PreparedAudio(split_audio_file(file_path, segment_duration=segment_duration), duration)
+    return PreparedAudio([AudioSegment(file_path, 0.0, duration)], duration)
+
+
+def acquire_and_prepare(video_id: str, work_dir: Path, profile_name: str, max_segment_seconds: int,
+                        silence: Optional[SilenceSettings], cookies_path: Optional[str],
+                        cache_root: Optional[Path] = None, cache_max_bytes: int = 0,
+                        start: float = 0.0) -> PreparedAudio:
+    """Worker-process entry point: download (or reuse cached) audio into work_dir, then segment it"""
+    profile = get_audio_profile(profile_name)
+
+    def download(out_dir: Path) -> Path:
+        return download_audio(video_id, out_dir, profile, cookies_path)
+
+    cache_hit = None
+    if cache_root is None:
+        audio_file = download(work_dir)
+    else:
+        # checkout() holds a per-key flock while downloading, so workers sharing the
+        # directory download each video once and the others wait for it
+        cache = AudioCache(cache_root, cache_max_bytes)
+        audio_file = cache.checkout(video_id, profile.name, work_dir, download)
+        cache_hit = cache.hits > 0
+
+    prepared = prepare_segments(audio_file, profile_name, max_segment_seconds, silence, start)
+    return prepared._replace(cache_hit=cache_hit)
+
+
+def warm_up() -> int:
+    """No-op task used to start the pool's processes ahead of the first job"""
+    return 0
@@ -0,0 +1,489 @@
+"""
+缓存存储 - 可插拔的持久化后端（JSON 文件 / SQLite）与进程内 LRU 缓存层
+
+用法（一次性把 JSON 文件缓存迁移到 SQLite）:
+    python server/cache_store.py migrate --from ./cache --to ./cache/cache.db
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Versioned entry encoding: MAGIC + format version + codec id + payload.
+# Entries without the magic prefix are legacy plain (pretty-printed) JSON.
+ENTRY_MAGIC = b"VSC"
+ENTRY_VERSION = 1
+CODECS = {"none": 0, "gzip": 1, "zstd": 2}
+_CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+
+def resolve_compression(name: str) -> str:
+    """Validate a CACHE_COMPRESSION value, falling back to gzip when zstandard is missing"""
+    if name not in CODECS:
+        raise ValueError(f"Unknown cache compression '{name}' (available: {', '.join(CODECS)})")
+    if name == "zstd" and zstandard is None:
+        print("⚠️ zstandard is not installed, using gzip for cache entries")
+        return "gzip"
+    return name
+
+
+def encode_entry(data: Dict[str, Any], compression: str = "gzip") -> bytes:
+    """Serialize an entry as compact JSON, compressed with the given codec"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if compression == "gzip":
+        payload = gzip.compress(payload, compresslevel=6)
+    elif compression == "zstd":
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    return ENTRY_MAGIC + bytes([ENTRY_VERSION, CODECS[compression]]) + payload
+
+
+def decode_entry(raw: bytes) -> Dict[str, Any]:
+    """Decode any entry written by encode_entry, or a legacy plain-JSON entry"""
+    if not raw.startswith(ENTRY_MAGIC):
+        return json.loads(raw)
+
+    version, codec = raw[len(ENTRY_MAGIC)], raw[len(ENTRY_MAGIC) + 1]
+    if version != ENTRY_VERSION:
+        raise ValueError(f"Unsupported cache entry version {version}")
+    payload = raw[len(ENTRY_MAGIC) + 2:]
+    name = _CODEC_NAMES.get(codec)
+    if name is None:
+        raise ValueError(f"Unknown cache entry codec {codec}")
+    if name == "zstd" and zstandard is None:
+        raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+    try:
+        if name == "gzip":
+            payload = gzip.decompress(payload)
+        elif name == "zstd":
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+    except Exception as e:
+        raise ValueError(f"Corrupted {name} cache entry: {e}")
+    return json.loads(payload)
+
+
+class LRUCache:
+    """Bounded in-memory LRU tier, limited by entry count and total bytes
+
+    Entries expire ``ttl`` seconds after the timestamp they were stored with,
+    matching the on-disk TTL. Hit/miss/eviction counters help size the tier.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, _, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any], size: int, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes or self.max_entries <= 0:
+                return  # too large for this tier; disk still has it
+
+            self._entries[key] = (value, size, stored_at if stored_at is not None else time.time())
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CacheBackend:
+    """Persistent cache store behind read_cache_entry / write_cache_entry
+
+    Entries are JSON-serializable dicts; ``get`` returns the entry and its
+    stored size in bytes, or None when it is missing or expired.
+    """
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        raise NotImplementedError
+
+    def set(self, key: str, data: Dict[str, Any]) -> int:
+        """Store an entry (its 'timestamp' field marks creation) and return its size in bytes"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        """Note a read served by a faster tier, for backends that evict by recency"""
+
+    def sweep(self) -> int:
+        """Remove expired entries (and enforce any size cap); returns how many were removed"""
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JsonFileBackend(CacheBackend):
+    """One file per entry in a flat directory
+
+    New entries are written as ``<key>.cache`` in the versioned encoding;
+    legacy ``<key>.json`` files from the original layout are still read.
+    """
+
+    def __init__(self, cache_dir: Path, ttl: float, compression: str = "gzip"):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.compression = resolve_compression(compression)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.cache"
+
+    def _legacy_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _files(self) -> Iterator[Path]:
+        yield from self.cache_dir.glob("*.cache")
+        yield from self.cache_dir.glob("*.json")
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        cache_file = self._path(key)
+        if not cache_file.exists():
+            cache_file = self._legacy_path(key)
+            if not cache_file.exists():
+                return None
+
+        try:
+            raw = cache_file.read_bytes()
+            data = decode_entry(raw)
+
+            # Check expiration
+            if time.time() - data.get('timestamp', 0) > self.ttl:
+                cache_file.unlink()  # Remove expired cache
+                return None
+
+            return data, len(raw)
+
+        except (ValueError, KeyError, OSError):
+            # Remove corrupted cache
+            try:
+                cache_file.unlink()
+            except:
+                pass
+            return None
+
+    def set(self, key: str, data: Dict[str, Any]) -> int:
+        raw = encode_entry(data, self.compression)
+        # Write a temp file and rename it into place, so get() never sees (and deletes) a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            self._unlink(Path(tmp))
+            raise
+        self._unlink(self._legacy_path(key))
+        return len(raw)
+
+    def delete(self, key: str) -> None:
+        self._unlink(self._path(key))
+        self._unlink(self._legacy_path(key))
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def sweep(self) -> int:
+        """Expire entries by file mtime, without reading them
+
+        A file is written when its entry is stored, so its mtime is never older
+        than the entry's timestamp; get() still applies the exact TTL. Temp files
+        left behind by an interrupted set() are removed too.
+        """
+        removed = 0
+        now = time.time()
+        for cache_file in [*self._files(), *self.cache_dir.glob(".*.tmp")]:
+            try:
+                if now - cache_file.stat().st_mtime > self.ttl:
+                    cache_file.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for cache_file in list(self._files()):
+            entry = self.get(cache_file.stem)
+            if entry is not None:
+                yield cache_file.stem, entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        files = list(self._files())
+        return {
+            "backend": "json",
+            "compression": self.compression,
+            "entries": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+        }
+
+
+class SQLiteBackend(CacheBackend):
+    """SQLite store (WAL mode) indexed by key and expiry, with batched sweeps and an LRU size cap"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at);
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # Reads refresh accessed_at at most this often, so hot keys do not turn every hit into a write
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, db_path: Path, ttl: float, max_bytes: int = 0, sweep_batch: int = 500,
+                 compression: str = "gzip"):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compression = resolve_compression(compression)
+        self.sweep_batch = sweep_batch
+        self._local = threading.local()
+        self._touch_lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._touches_flushed_at = time.time()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers proceed while a writer commits"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, size FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                (now, key, now - self.TOUCH_INTERVAL),
+            )
+        try:
+            return decode_entry(row[0]), row[1]
+        except ValueError:
+            self.delete(key)
+            return None
+
+    def set(self, key: str, data: Dict[str, Any]) -> int:
+        raw = encode_entry(data, self.compression)
+        created_at = data.get('timestamp', time.time())
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, raw, len(raw), created_at, created_at + self.ttl, time.time()),
+            )
+        return len(raw)
+
+    def delete(self, key: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def touch(self, key: str) -> None:
+        """Record a memory-tier hit; written to accessed_at in one batch every TOUCH_INTERVAL"""
+        now = time.time()
+        with self._touch_lock:
+            self._touched[key] = now
+            due = now - self._touches_flushed_at >= self.TOUCH_INTERVAL
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self) -> None:
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+            self._touches_flushed_at = time.time()
+        if touched:
+            with self._conn() as conn:
+                conn.executemany(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                    [(at, key, at) for key, at in touched.items()],
+                )
+
+    def sweep(self) -> int:
+        """Delete expired rows, then least-recently-used rows until under max_bytes, in small batches"""
+        self.flush_touches()  # hot keys served from memory must not look idle to the LRU cap
+        conn = self._conn()
+        removed = 0
+        while True:
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries WHERE expires_at <= ? LIMIT ?)",
+                    (time.time(), self.sweep_batch),
+                )
+            removed += cur.rowcount
+            if cur.rowcount < self.sweep_batch:
+                break
+
+        if self.max_bytes > 0:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            while total > self.max_bytes:
+                victims = conn.execute(
+                    "SELECT key, size FROM cache_entries ORDER BY accessed_at LIMIT ?", (self.sweep_batch,)
+                ).fetchall()
+                if not victims:
+                    break
+                batch = []
+                for key, size in victims:
+                    batch.append((key,))
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+                with conn:
+                    conn.executemany("DELETE FROM cache_entries WHERE key = ?", batch)
+                removed += len(batch)
+        return removed
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM cache_entries WHERE expires_at > ?", (time.time(),)
+        )
+        for key, value in rows:
+            yield key, decode_entry(value)
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM cache_meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)", (name, value))
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "compression": self.compression,
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def migrate_json_cache(json_dir: Path, backend: CacheBackend) -> int:
+    """Copy every unexpired JSON cache file into another backend, keeping original timestamps"""
+    migrated = 0
+    for key, data in JsonFileBackend(json_dir, getattr(backend, "ttl", float("inf"))).items():
+        backend.set(key, data)
+        migrated += 1
+    return migrated
+
+
+def create_cache_backend(kind: str, cache_dir: Path, ttl: float, max_bytes: int = 0,
+                         compression: str = "gzip") -> CacheBackend:
+    """Build the configured backend; the SQLite store imports existing JSON files once"""
+    if kind == "json":
+        return JsonFileBackend(cache_dir, ttl, compression)
+    if kind == "sqlite":
+        backend = SQLiteBackend(cache_dir / "cache.db", ttl, max_bytes, compression=compression)
+        if backend.get_meta("json_migrated") is None:
+            migrated = migrate_json_cache(cache_dir, backend)
+            backend.set_meta("json_migrated", str(time.time()))
+            print(f"📦 Migrated {migrated} JSON cache entries into {backend.db_path}")
+        return backend
+    raise ValueError(f"Unknown cache backend '{kind}' (available: json, sqlite)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="copy JSON cache files into an SQLite cache")
+    migrate.add_argument("--from", dest="src", type=Path, default=Path("./cache"))
+    migrate.add_argument("--to", dest="dst", type=Path, default=Path("./cache/cache.db"))
+    migrate.add_argument("--ttl", type=float, default=86400)
+    args = parser.parse_args()
+
+    count = migrate_json_cache(args.src, SQLiteBackend(args.dst, args.ttl))
+    print(f"Migrated {count} entries from {args.src} to {args.dst}")
@@ -0,0 +1,138 @@
+"""
+字幕快速通道 - 直接读取 YouTube 字幕轨道（人工或自动生成），跳过音频下载与 Whisper 转录
+"""
+
+import html
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:  # only the default extractor needs yt-dlp; parsing works without it
+    YoutubeDL = None
+
+# Preferred caption formats, best first
+CAPTION_FORMATS = ("srv3", "vtt")
+MIN_CAPTION_CHARS = 50
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class YtDlpCaptionExtractor:
+    """Default extractor: yt-dlp metadata lookup plus a plain HTTP fetch of the track"""
+
+    def __init__(self, cookies_path: Optional[str] = None):
+        self.opts: Dict[str, Any] = {
+            "skip_download": True,
+            "noplaylist": True,
+            "quiet": True,
+            "no_warnings": True,
+            "cachedir": False,
+        }
+        if cookies_path:
+            self.opts["cookiefile"] = cookies_path
+
+    def extract_info(self, url: str) -> Dict[str, Any]:
+        with YoutubeDL(self.opts) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    def fetch(self, url: str) -> str:
+        with YoutubeDL(self.opts) as ydl:
+            return ydl.urlopen(url).read().decode("utf-8", errors="ignore")
+
+
+def _lang_matches(track_lang: str, lang: str) -> bool:
+    return track_lang == lang or track_lang.split("-")[0] == lang.split("-")[0]
+
+
+def select_caption_track(info: Dict[str, Any], lang: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Pick the best caption track: manual subtitles first, then auto captions in the spoken language
+
+    Returns (track language, format entry) or None when no usable track exists.
+    """
+    manual = {k: v for k, v in (info.get("subtitles") or {}).items() if k != "live_chat"}
+    auto = info.get("automatic_captions") or {}
+    spoken = info.get("language") or ""
+
+    candidates: List[Tuple[str, List[Dict[str, Any]]]] = []
+    candidates += [(k, v) for k, v in manual.items() if _lang_matches(k, lang)]
+    if spoken:
+        candidates += [(k, v) for k, v in manual.items() if _lang_matches(k, spoken)]
+    candidates += list(manual.items())
+    if spoken:
+        # "-orig" marks YouTube's ASR track in the spoken language (not machine-translated)
+        candidates += [(k, v) for k, v in auto.items() if k in (f"{spoken}-orig", spoken)]
+    candidates += [(k, v) for k, v in auto.items() if _lang_matches(k, lang)]
+
+    for track_lang, formats in candidates:
+        by_ext = {f.get("ext"): f for f in formats if f.get("url")}
+        for ext in CAPTION_FORMATS:
+            if ext in by_ext:
+                return track_lang, by_ext[ext]
+    return None
+
+
+def _dedupe_lines(lines: List[str]) -> List[str]:
+    """Drop empty lines and the rolling repeats found in YouTube auto captions"""
+    result: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if line and (not result or result[-1] != line):
+            result.append(line)
+    return result
+
+
+def parse_vtt(content: str) -> str:
+    """Extract plain text from a WebVTT caption file"""
+    lines = []
+    skip_block = False
+    rows = [raw.strip() for raw in content.splitlines()]
+    for i, line in enumerate(rows):
+        if not line:
+            skip_block = False
+            continue
+        if skip_block or "-->" in line:
+            continue
+        if i + 1 < len(rows) and "-->" in rows[i + 1]:
+            continue  # cue identifier (often a number); a caption line that is just "2024" is kept
+        if line.startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+            # Header and metadata blocks run until the next blank line
+            skip_block = True
+            continue
+        lines.append(html.unescape(_TAG_RE.sub("", line)))
+    return " ".join(_dedupe_lines(lines))
+
+
+def parse_srv3(content: str) -> str:
+    """Extract plain text from YouTube's srv3 (timedtext XML) caption format"""
+    root = ET.fromstring(content)
+    lines = ["".join(p.itertext()) for p in root.iter("p")]
+    return " ".join(_dedupe_lines(lines))
+
+
+CAPTION_PARSERS = {"vtt": parse_vtt, "srv3": parse_srv3}
+
+
+def fetch_caption_transcript(video_id: str, lang: str = "zh", extractor=None) -> Optional[str]:
+    """Return a transcript built from the video's caption track, or None to fall back to audio
+
+    ``extractor`` needs ``extract_info(url)`` and ``fetch(url)``; it defaults
+    to yt-dlp and can be swapped for a stub serving fixture caption files.
+    """
+    extractor = extractor or YtDlpCaptionExtractor()
+    info = extractor.extract_info(f"https://www.youtube.com/watch?v={video_id}")
+
+    track = select_caption_track(info, lang)
+    if track is None:
+        print(f"💬 No caption track for video {video_id}")
+        return None
+
+    track_lang, fmt = track
+    text = CAPTION_PARSERS[fmt["ext"]](extractor.fetch(fmt["url"]))
+    if len(text) < MIN_CAPTION_CHARS:
+        print(f"💬 Caption track {track_lang} for video {video_id} is too short, ignoring")
+        return None
+
+    print(f"💬 Using {track_lang} captions ({fmt['ext']}) for video {video_id}")
+    return text
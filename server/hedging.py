@@ -0,0 +1,168 @@
+"""
+请求对冲 - 并发执行一组任务；某个任务的远程调用耗时超过同批已完成调用的 p95 时，再发一份副本，取先完成的结果
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+
+class HedgeStats:
+    """Counters for how often hedges fire and win, shared across runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tasks = 0
+        self.failed = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tasks": self.tasks,
+                "failed": self.failed,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+            }
+
+
+_current = threading.local()
+
+
+@contextmanager
+def measured() -> Iterator[None]:
+    """Mark the remote call inside a hedged task; only this span is timed and can trigger a hedge
+
+    Outside run_hedged (or in code that never enters it, like a cache hit) this
+    is a no-op, so waiting for a rate limiter or reading a checkpoint never
+    counts as latency. With retries, the last span is the one recorded.
+    """
+    on_span = getattr(_current, "on_span", None)
+    if on_span is None:
+        yield
+        return
+    begin = time.monotonic()
+    on_span(begin)
+    try:
+        yield
+    finally:
+        _current.latency = time.monotonic() - begin
+        on_span(None)
+
+
+def _quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def run_hedged(fn: Callable[[int, Any], Any], items: Sequence[Any], workers: int,
+               hedging: bool = True, min_samples: int = 3, quantile: float = 0.95,
+               poll_interval: float = 0.5, stats: Optional[HedgeStats] = None,
+               on_settled: Optional[Callable[[int], None]] = None,
+               can_hedge: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+    """Run ``fn(index, item)`` for every item, yielding ``(index, result, error)`` as each one finishes
+
+    Latency is the time ``fn`` spends inside ``measured()``. Once ``min_samples``
+    tasks have been measured, a task whose measured span runs longer than the
+    ``quantile`` of those latencies gets one duplicate; whichever attempt
+    succeeds first wins. A task only fails when all its attempts failed.
+    No hedge is sent while ``can_hedge()`` returns False (e.g. the backend is
+    rate limited). ``on_settled(index)`` runs after the last attempt of a task
+    has finished, including a losing attempt that completes after the result
+    was yielded.
+    """
+    stats = stats or HedgeStats()
+    lock = threading.Lock()
+    spans: Dict[Tuple[int, bool], float] = {}  # start of the measured span each attempt is in
+    attempts_left: Dict[int, int] = {}
+    latencies: List[float] = []
+
+    def attempt(index: int, item: Any, is_hedge: bool) -> Tuple[Any, Optional[float]]:
+        key = (index, is_hedge)
+
+        def on_span(begin: Optional[float]) -> None:
+            with lock:
+                if begin is None:
+                    spans.pop(key, None)
+                else:
+                    spans[key] = begin
+
+        _current.on_span, _current.latency = on_span, None
+        try:
+            return fn(index, item), _current.latency
+        finally:
+            _current.on_span = None
+            on_span(None)
+
+    def settle(index: int, _: Future) -> None:
+        with lock:
+            attempts_left[index] -= 1
+            last = attempts_left[index] == 0
+        if last and on_settled:
+            on_settled(index)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="primary")
+    hedge_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="hedge")
+    pending: Dict[Future, Tuple[int, bool]] = {}
+    hedged: Set[int] = set()
+    done: Set[int] = set()
+
+    def submit(executor: ThreadPoolExecutor, index: int, is_hedge: bool) -> None:
+        with lock:
+            attempts_left[index] = attempts_left.get(index, 0) + 1
+        future = executor.submit(attempt, index, items[index], is_hedge)
+        pending[future] = (index, is_hedge)
+        future.add_done_callback(lambda f, index=index: settle(index, f))
+
+    try:
+        for index in range(len(items)):
+            submit(pool, index, False)
+        stats.add(tasks=len(items))
+
+        while len(done) < len(items):
+            finished, _ = wait(list(pending), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, is_hedge = pending.pop(future)
+                if index in done:
+                    continue  # the other attempt already won
+                error = future.exception()
+                if error is None:
+                    result, latency = future.result()
+                    done.add(index)
+                    if latency is not None:
+                        latencies.append(latency)
+                    if is_hedge:
+                        stats.add(hedge_wins=1)
+                    yield index, result, None
+                elif not any(i == index for i, _ in pending.values()):
+                    done.add(index)
+                    stats.add(failed=1)
+                    yield index, None, error
+
+            if not hedging or len(latencies) < min_samples or (can_hedge is not None and not can_hedge()):
+                continue
+            threshold = _quantile(latencies, quantile)
+            now = time.monotonic()
+            with lock:
+                slow = [index for (index, is_hedge), begin in spans.items()
+                        if not is_hedge and index not in done and index not in hedged and now - begin > threshold]
+            for index in slow:
+                hedged.add(index)
+                stats.add(hedged=1)
+                print(f"🪞 Hedging task {index}: running longer than p{int(quantile * 100)} ({threshold:.1f}s)")
+                submit(hedge_pool, index, True)
+    finally:
+        # Losing attempts keep running in the background; don't wait for them
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+        hedge_pool.shutdown(wait=False)
@@ -0,0 +1,183 @@
+"""
+持久化任务队列 - 用 SQLite 记录总结任务的状态与尝试次数，服务重启后重新排队未完成的任务
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class SQLiteJobQueue:
+    """Durable job records: queued → running → completed / error, with attempt counts"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            video_id TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            batch_id TEXT,
+            priority INTEGER NOT NULL DEFAULT 0,
+            cached INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+    """
+
+    # Columns added after the first release; older databases get them on open
+    MIGRATIONS = {
+        "batch_id": "ALTER TABLE jobs ADD COLUMN batch_id TEXT",
+        "priority": "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+        "cached": "ALTER TABLE jobs ADD COLUMN cached INTEGER NOT NULL DEFAULT 0",
+    }
+
+    def __init__(self, db_path: Path, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._enqueue_lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in self.MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets status reads proceed while a worker commits"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # an accepted job must survive a crash
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cached"] = bool(job["cached"])
+        return job
+
+    def enqueue(self, job_id: str, video_id: str, lang: str, max_active: int) -> bool:
+        """Persist a new queued job; False when ``max_active`` jobs are already queued or running
+
+        Batch items run on their own pool and do not count against ``max_active``.
+        """
+        with self._enqueue_lock:
+            conn = self._conn()
+            (active,) = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?) AND batch_id IS NULL", ACTIVE_STATUSES
+            ).fetchone()
+            if active >= max_active:
+                return False
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, video_id, lang, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                    (job_id, video_id, lang, time.time()),
+                )
+            return True
+
+    def enqueue_batch(
+        self, batch_id: str, lang: str, items: List[Tuple[str, str]], priority: int,
+        cached: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Persist every ``(job_id, video_id)`` item of a batch in one transaction
+
+        Items whose summary is in ``cached`` are stored as already completed.
+        """
+        cached = cached or {}
+        now = time.time()
+        rows = []
+        for job_id, video_id in items:
+            result = cached.get(video_id)
+            rows.append((
+                job_id, video_id, lang,
+                "queued" if result is None else "completed",
+                None if result is None else json.dumps(result, ensure_ascii=False),
+                now, None if result is None else now,
+                batch_id, priority, result is not None,
+            ))
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO jobs (job_id, video_id, lang, status, result, created_at, finished_at, "
+                "batch_id, priority, cached) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def start(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Claim a queued job for a worker, counting the attempt; None if it is not queued"""
+        conn = self._conn()
+        with conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            ).rowcount
+        return self.get(job_id) if claimed else None
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._finish(job_id, "completed", result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "error", error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def batch_jobs(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Every item of a batch, in the order it was submitted"""
+        rows = self._conn().execute("SELECT * FROM jobs WHERE batch_id = ? ORDER BY rowid", (batch_id,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def recover(self) -> List[str]:
+        """Requeue jobs interrupted by a restart and return every queued job id, oldest first
+
+        A job that has already used ``max_attempts`` attempts is failed instead,
+        so one job that keeps crashing the server cannot wedge the queue.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, finished_at = ? "
+                "WHERE status = 'running' AND attempts >= ?",
+                (f"Interrupted {self.max_attempts} times, giving up", time.time(), self.max_attempts),
+            )
+            conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        rows = conn.execute("SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        return [row["job_id"] for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs older than ``older_than`` seconds, keeping batches that are still running"""
+        conn = self._conn()
+        with conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ? AND (batch_id IS NULL OR "
+                "batch_id NOT IN (SELECT batch_id FROM jobs WHERE batch_id IS NOT NULL AND status IN (?, ?)))",
+                (time.time() - older_than, *ACTIVE_STATUSES),
+            ).rowcount
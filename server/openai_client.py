@@ -0,0 +1,172 @@
+"""
+OpenAI 客户端 - 进程内共享一个 AsyncOpenAI（httpx 连接池复用 keep-alive 连接），所有调用方都通过它访问 API
+
+客户端绑定在一个专用的事件循环线程上：同步代码（线程池中的请求处理、转录 worker）
+提交协程并阻塞等待结果，不再各自创建客户端、各自建立连接。调用线程仍会阻塞，
+这里解决的是连接复用与连接数上限，不是每个进行中请求占用一个线程的问题。
+"""
+
+import asyncio
+import importlib.util
+import os
+import queue
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Iterator, NamedTuple, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+try:
+    from .rate_limiter import RetryHint
+except ImportError:
+    from rate_limiter import RetryHint
+
+T = TypeVar("T")
+ClientCall = Callable[[AsyncOpenAI], Awaitable[T]]
+
+
+class OpenAIClientConfig(NamedTuple):
+    api_key: Optional[str]
+    base_url: Optional[str] = None
+    max_connections: int = 64
+    max_keepalive: int = 32
+    keepalive_expiry: float = 30.0
+    timeout: float = 600.0
+    connect_timeout: float = 10.0
+    max_retries: int = 2
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "OpenAIClientConfig":
+        return cls(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "64")),
+            max_keepalive=int(os.getenv("OPENAI_MAX_KEEPALIVE", "32")),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+            timeout=float(os.getenv("OPENAI_TIMEOUT", "600")),  # long Whisper uploads
+            connect_timeout=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+            http2=os.getenv("OPENAI_HTTP2", "false").lower() == "true",
+        )
+
+
+class SharedOpenAIClient:
+    """An AsyncOpenAI client and its connection pool, owned by a dedicated event-loop thread"""
+
+    def __init__(self, config: OpenAIClientConfig):
+        self.config = config
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openai-client", daemon=True)
+        self._thread.start()
+        try:
+            # The httpx pool must be created on the loop that will use it
+            self.client: AsyncOpenAI = asyncio.run_coroutine_threadsafe(self._create(), self._loop).result()
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    async def _create(self) -> AsyncOpenAI:
+        http2 = self.config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("⚠️ OPENAI_HTTP2=true but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout),
+            http2=http2,
+        )
+        return AsyncOpenAI(
+            api_key=self.config.api_key,
+            base_url=self.config.base_url,
+            max_retries=self.config.max_retries,
+            http_client=http_client,
+        )
+
+    def call(self, fn: "ClientCall[T]") -> T:
+        """Run ``fn(client)`` on the client loop and block until it finishes (for sync callers)"""
+        return asyncio.run_coroutine_threadsafe(fn(self.client), self._loop).result()
+
+    def stream(self, fn: "ClientCall[Any]") -> Iterator[Any]:
+        """Iterate a streaming response (``stream=True``) from sync code
+
+        Closing the iterator early cancels the request and releases its connection.
+        """
+        items: "queue.Queue[Any]" = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                response = await fn(self.client)
+                try:
+                    async for item in response:
+                        items.put_nowait(item)
+                finally:
+                    await response.close()
+            finally:
+                items.put_nowait(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = items.get()
+                if item is done:
+                    break
+                yield item
+            future.result()  # re-raise API errors
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        """Close pooled connections and stop the loop thread"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _retry_after_seconds(headers: httpx.Headers) -> Optional[float]:
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value) * scale
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def classify_openai_error(exc: BaseException) -> Optional[RetryHint]:
+    """Retry policy for scheduled calls: 429s honour Retry-After, transient errors back off"""
+    if isinstance(exc, RateLimitError):
+        if getattr(exc, "code", None) == "insufficient_quota":
+            return None  # billing problem, waiting will not help
+        return RetryHint(_retry_after_seconds(exc.response.headers) or 1.0, rate_limited=True)
+    if isinstance(exc, (APIConnectionError, InternalServerError)):  # includes timeouts
+        return RetryHint(None, rate_limited=False)
+    return None
+
+
+_shared: Optional[SharedOpenAIClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_openai_client(config: Optional[OpenAIClientConfig] = None) -> SharedOpenAIClient:
+    """Process-wide shared client, created on first use from ``config`` or the environment"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedOpenAIClient(config or OpenAIClientConfig.from_env())
+        return _shared
@@ -0,0 +1,141 @@
+"""
+进度存储 - 按 job id 保存进度记录（附 video_id 二级索引），完成后按 TTL 过期并限制总条目数
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+FINISHED_STATUSES = ("completed", "error")
+
+Listener = Callable[[Dict[str, Any]], None]
+
+
+class ProgressStore:
+    """Interface for progress records, so the store can later move out of process"""
+
+    def create(self, job_id: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def latest_for_video(self, video_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def prune(self) -> int:
+        raise NotImplementedError
+
+    def subscribe(self, keys: Iterable[str], listener: Listener) -> Callable[[], None]:
+        """Call ``listener`` with a record snapshot whenever a record whose job id or
+        video_id is in ``keys`` is created or updated; returns an unsubscribe function"""
+        raise NotImplementedError
+
+
+class InMemoryProgressStore(ProgressStore):
+    """Process-local store: finished records expire after ``ttl`` seconds, at most ``max_entries`` kept"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._latest_by_video: Dict[str, str] = {}
+        self._listeners: Dict[str, Set[Listener]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._prune_locked()
+            self._records[job_id] = {**record, "job_id": job_id}
+            self._latest_by_video[record["video_id"]] = job_id
+            while len(self._records) > self.max_entries:
+                self._evict_one_locked()
+            snapshot, listeners = self._snapshot_locked(job_id)
+        self._notify(snapshot, listeners)
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return  # already expired or evicted
+            record.update(fields)
+            if fields.get("status") in FINISHED_STATUSES:
+                record["finished_at"] = time.time()
+            snapshot, listeners = self._snapshot_locked(job_id)
+        self._notify(snapshot, listeners)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None or self._expired(record):
+                return None
+            return dict(record)
+
+    def latest_for_video(self, video_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job_id = self._latest_by_video.get(video_id)
+        return self.get(job_id) if job_id else None
+
+    def prune(self) -> int:
+        with self._lock:
+            return self._prune_locked()
+
+    def subscribe(self, keys: Iterable[str], listener: Listener) -> Callable[[], None]:
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._listeners.setdefault(key, set()).add(listener)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                for key in keys:
+                    listeners = self._listeners.get(key)
+                    if listeners is not None:
+                        listeners.discard(listener)
+                        if not listeners:
+                            del self._listeners[key]
+
+        return unsubscribe
+
+    def _snapshot_locked(self, job_id: str):
+        record = self._records.get(job_id)
+        if record is None:
+            return None, []
+        listeners = self._listeners.get(job_id, set()) | self._listeners.get(record["video_id"], set())
+        return dict(record), list(listeners)
+
+    @staticmethod
+    def _notify(snapshot: Optional[Dict[str, Any]], listeners: List[Listener]) -> None:
+        # Called outside the lock so a slow listener never blocks other updates
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"⚠️ Progress listener failed: {e}")
+
+    def _expired(self, record: Dict[str, Any]) -> bool:
+        finished_at = record.get("finished_at")
+        return finished_at is not None and time.time() - finished_at > self.ttl
+
+    def _remove_locked(self, job_id: str) -> None:
+        record = self._records.pop(job_id)
+        if self._latest_by_video.get(record["video_id"]) == job_id:
+            del self._latest_by_video[record["video_id"]]
+
+    def _prune_locked(self) -> int:
+        expired = [job_id for job_id, record in self._records.items() if self._expired(record)]
+        for job_id in expired:
+            self._remove_locked(job_id)
+        return len(expired)
+
+    def _evict_one_locked(self) -> None:
+        # Oldest finished record first; only drop a running one if nothing else is left
+        for job_id, record in self._records.items():
+            if record.get("status") in FINISHED_STATUSES:
+                self._remove_locked(job_id)
+                return
+        self._remove_locked(next(iter(self._records)))
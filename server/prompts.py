@@ -13,4 +13,20 @@ USER_TEMPLATE = (
     "以下是转录文本（可能含中英文混合、口语化）：\n\n"
     "{transcript}\n\n"
     "请输出：\n- 3–5 条要点（列表，每条一行）。\n- 末尾可选'整体观点：…'。"
-)
\ No newline at end of file
+)
+
+# 长转录文本分块总结（map 阶段）：保持原文语言，以便不同目标语言复用同一批分块笔记
+SYSTEM_CHUNK_NOTES = (
+    "你是资深投研助手。下面是一段长视频转录文本中的一个片段。"
+    "请提炼该片段中的关键观点、判断与依据，供后续汇总使用。"
+    "要求：\n"
+    "1) 使用转录原文的语言输出；\n"
+    "2) 每条一行，最多 8 条，保留关键数字与公司/资产名称；\n"
+    "3) 不编造数据，不补充片段外的信息。"
+)
+
+CHUNK_TEMPLATE = (
+    "以下是长视频转录文本的第 {index}/{total} 部分：\n\n"
+    "{chunk}\n\n"
+    "请输出该部分的要点笔记（列表，每条一行）。"
+)
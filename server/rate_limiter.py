@@ -0,0 +1,248 @@
+"""
+限流调度 - 按模型维护令牌桶（每分钟请求数 + token / 音频秒数），按优先级排队放行，遇到 429 / Retry-After 自动暂停并降速
+
+交互请求（插件弹窗、单个任务）优先于批量任务；优先级通过 contextvar 随调用线程传递。
+"""
+
+import contextvars
+import functools
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 1
+
+_priority: "contextvars.ContextVar[int]" = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(level: int) -> Iterator[None]:
+    """Run the enclosed calls at the given scheduling priority (lower goes first)"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def bind_priority(fn: Callable[..., T]) -> Callable[..., T]:
+    """Carry the caller's priority into a worker thread (executors do not copy contextvars)"""
+    level = _priority.get()
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with request_priority(level):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class ModelLimits(NamedTuple):
+    requests_per_minute: float  # 0 = not limited
+    units_per_minute: float = 0  # tokens for chat models, audio seconds for Whisper; 0 = not limited
+
+
+class RetryHint(NamedTuple):
+    delay: Optional[float]  # None: use exponential backoff
+    rate_limited: bool
+
+
+class TokenBucket:
+    """Holds up to one minute of budget and refills continuously"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, factor: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * factor)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) / (self.rate * factor)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.requests = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute > 0 else None
+        self.units = TokenBucket(limits.units_per_minute) if limits.units_per_minute > 0 else None
+        self.factor = 1.0  # share of the configured rate currently used, lowered after 429s
+        self.paused_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.granted = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def wait_time(self, now: float, units: float) -> float:
+        wait = self.paused_until - now
+        if self.requests is not None:
+            self.requests.refill(now, self.factor)
+            wait = max(wait, self.requests.wait_time(1, self.factor))
+        if self.units is not None:
+            self.units.refill(now, self.factor)
+            wait = max(wait, self.units.wait_time(units, self.factor))
+        return wait
+
+
+class RateLimitScheduler:
+    """Admit API calls per model within their limits, highest priority first
+
+    ``classify(exc)`` decides whether a failed call is retried: it returns a
+    RetryHint, or None for errors that should propagate.
+    """
+
+    MIN_FACTOR = 0.25
+    RECOVERY_STEP = 0.05
+    BACKOFF_CAP = 30.0
+
+    def __init__(self, limits: Dict[str, ModelLimits],
+                 classify: Optional[Callable[[BaseException], Optional[RetryHint]]] = None,
+                 max_retries: int = 5):
+        self._models = {model: _ModelState(model_limits) for model, model_limits in limits.items()
+                        if model_limits.requests_per_minute > 0 or model_limits.units_per_minute > 0}
+        self.classify = classify
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def acquire(self, model: str, units: float = 0.0) -> None:
+        """Block until ``model`` has budget for one request of ``units``; models without limits pass"""
+        state = self._models.get(model)
+        if state is None:
+            return
+        entry = (_priority.get(), next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(state.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = state.wait_time(now, units)
+                    if state.waiters[0] == entry and wait <= 0:
+                        heapq.heappop(state.waiters)
+                        if state.requests is not None:
+                            state.requests.take(1)
+                        if state.units is not None:
+                            state.units.take(units)
+                        state.granted += 1
+                        state.wait_seconds += now - started
+                        self._cond.notify_all()  # next waiter becomes head
+                        return
+                    # Not at the head: sleep until notified, re-checking periodically
+                    self._cond.wait(timeout=wait if state.waiters[0] == entry else max(wait, 1.0))
+            except BaseException:
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                self._cond.notify_all()
+                raise
+
+    def backoff(self, model: str, delay: float) -> None:
+        """A 429 for ``model``: pause it for ``delay`` seconds and lower its rate"""
+        state = self._models.get(model)
+        if state is None:
+            return
+        with self._cond:
+            state.rate_limited += 1
+            state.paused_until = max(state.paused_until, time.monotonic() + delay)
+            state.factor = max(self.MIN_FACTOR, state.factor * 0.75)
+            self._cond.notify_all()
+
+    def congested(self, model: str) -> bool:
+        """True while ``model`` is paused after a 429 or has callers queued for budget"""
+        state = self._models.get(model)
+        if state is None:
+            return False
+        with self._cond:
+            return bool(state.waiters) or state.paused_until > time.monotonic()
+
+    def succeeded(self, model: str) -> None:
+        state = self._models.get(model)
+        if state is not None and state.factor < 1.0:
+            with self._cond:
+                state.factor = min(1.0, state.factor + self.RECOVERY_STEP)
+
+    def _retry_delay(self, model: str, exc: BaseException, attempt: int) -> Optional[float]:
+        """Record a failure; returns seconds to sleep before retrying, None to give up"""
+        hint = self.classify(exc) if self.classify else None
+        if hint is None or attempt >= self.max_retries:
+            return None
+        state = self._models.get(model)
+        if state is not None:
+            with self._cond:
+                state.retries += 1
+        delay = hint.delay
+        if delay is None:
+            delay = min(self.BACKOFF_CAP, 2 ** attempt) * random.uniform(0.5, 1.0)
+        if hint.rate_limited and state is not None:
+            self.backoff(model, delay)
+            print(f"⏳ {model} rate limited, pausing {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            return 0.0  # the pause is enforced by acquire()
+        print(f"🔁 {model} call failed ({exc}), retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def run(self, model: str, units: float, fn: Callable[[], T]) -> T:
+        """Call ``fn`` once budget is available, retrying rate limits and transient errors"""
+        for attempt in itertools.count():
+            self.acquire(model, units)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._retry_delay(model, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.succeeded(model)
+            return result
+
+    def stream(self, model: str, units: float, open_stream: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """Like run() for streaming calls; only retried if nothing has been yielded yet"""
+        for attempt in itertools.count():
+            self.acquire(model, units)
+            items = open_stream()
+            started = False
+            try:
+                for item in items:
+                    started = True
+                    yield item
+            except Exception as e:
+                delay = None if started else self._retry_delay(model, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            finally:
+                close = getattr(items, "close", None)
+                if close:
+                    close()
+            self.succeeded(model)
+            return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {
+                model: {
+                    "queued": len(state.waiters),
+                    "granted": state.granted,
+                    "rate_limited": state.rate_limited,
+                    "retries": state.retries,
+                    "avg_wait_ms": round(state.wait_seconds * 1000 / state.granted, 1) if state.granted else 0.0,
+                    "rate_factor": round(state.factor, 2),
+                    "paused_for": round(max(0.0, state.paused_until - time.monotonic()), 1),
+                }
+                for model, state in self._models.items()
+            }
@@ -0,0 +1,107 @@
+"""
+字幕快速通道测试 - 用桩提取器和本地字幕样例验证选轨、解析与回退逻辑，不访问网络
+
+用法: python -m unittest discover -s server/tests
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+# 添加server目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from captions import fetch_caption_transcript, parse_srv3, parse_vtt
+
+FIXTURES = Path(__file__).parent / "fixtures" / "captions"
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class StubExtractor:
+    """Serves a canned info dict and maps track URLs to fixture files"""
+
+    def __init__(self, subtitles=None, automatic_captions=None, language=None):
+        self.info = {
+            "subtitles": subtitles or {},
+            "automatic_captions": automatic_captions or {},
+            "language": language,
+        }
+        self.fetched = []
+
+    def extract_info(self, url):
+        return self.info
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        return fixture(url)
+
+
+def track(ext, name):
+    return {"ext": ext, "url": name}
+
+
+class ParseTests(unittest.TestCase):
+    def test_vtt_rolling_auto_captions_are_deduplicated(self):
+        self.assertEqual(
+            parse_vtt(fixture("auto_en.vtt")),
+            "the market opened higher as investors bought chip stocks 2024 "
+            "earnings beat expectations & guidance rose",
+        )
+
+    def test_vtt_keeps_numeric_caption_lines(self):
+        content = "WEBVTT\n\n1\n00:00:00.000 --> 00:00:01.000\n2024\n\n2\n00:00:01.000 --> 00:00:02.000\n42\n"
+        self.assertEqual(parse_vtt(content), "2024 42")
+
+    def test_srv3_joins_word_spans_and_skips_blank_paragraphs(self):
+        text = parse_srv3(fixture("manual_zh.srv3"))
+        self.assertIn("标普500指数创下新高。", text)
+        self.assertTrue(text.startswith("大家好"))
+        self.assertNotIn("  ", text)
+
+
+class FetchCaptionTranscriptTests(unittest.TestCase):
+    def test_manual_track_wins_over_auto_captions(self):
+        extractor = StubExtractor(
+            subtitles={"zh-Hans": [track("srv3", "manual_zh.srv3")]},
+            automatic_captions={"zh-Hans": [track("vtt", "auto_en.vtt")]},
+            language="zh",
+        )
+        text = fetch_caption_transcript("vid", "zh", extractor=extractor)
+        self.assertEqual(extractor.fetched, ["manual_zh.srv3"])
+        self.assertEqual(text, parse_srv3(fixture("manual_zh.srv3")))
+
+    def test_srv3_is_preferred_over_vtt_within_a_track(self):
+        extractor = StubExtractor(subtitles={"zh": [track("vtt", "auto_en.vtt"), track("srv3", "manual_zh.srv3")]})
+        fetch_caption_transcript("vid", "zh", extractor=extractor)
+        self.assertEqual(extractor.fetched, ["manual_zh.srv3"])
+
+    def test_falls_back_to_spoken_language_auto_track(self):
+        # No zh track: use the original-language ASR rather than a machine translation
+        extractor = StubExtractor(
+            automatic_captions={
+                "zh-Hans": [track("srv3", "manual_zh.srv3")],
+                "en-orig": [track("vtt", "auto_en.vtt")],
+            },
+            language="en",
+        )
+        text = fetch_caption_transcript("vid", "zh", extractor=extractor)
+        self.assertEqual(extractor.fetched, ["auto_en.vtt"])
+        self.assertTrue(text.startswith("the market opened higher"))
+
+    def test_falls_back_to_manual_track_in_another_language(self):
+        extractor = StubExtractor(subtitles={"en": [track("vtt", "auto_en.vtt")]})
+        self.assertIsNotNone(fetch_caption_transcript("vid", "zh", extractor=extractor))
+        self.assertEqual(extractor.fetched, ["auto_en.vtt"])
+
+    def test_no_usable_track_returns_none(self):
+        extractor = StubExtractor(subtitles={"live_chat": [track("vtt", "auto_en.vtt")]})
+        self.assertIsNone(fetch_caption_transcript("vid", "zh", extractor=extractor))
+        self.assertEqual(extractor.fetched, [])
+
+
+if __name__ == "__main__":
+    unittest.main()